@@ -1,27 +1,45 @@
 # IMPLEMENTATION OF RDT 2.2 PROTOCOL
 
 import random
+import sys
+import struct
+from checksum import internet_checksum
+from loss_models import BernoulliLoss
+import events
 
 class NetworkChannel:
-    """A class representing an unreliable network channel with configurable error probability."""
+    """
+    A class representing an unreliable network channel with configurable error probability.
     
-    def __init__(self, error_rate=0.2):
+    Bit errors and ACK corruption are decided by loss models (see
+    loss_models.py), independent Bernoulli trials with the given rates by
+    default. All random draws, including which bit flips, come from rng.
+    """
+    
+    def __init__(self, error_rate=0.2, ack_error_rate=0.3, error_model=None, ack_error_model=None, rng=random):
         self.error_rate = error_rate
+        self.ack_error_rate = ack_error_rate
+        self.rng = rng
+        self.error_model = error_model if error_model is not None else BernoulliLoss(error_rate, rng)
+        self.ack_error_model = ack_error_model if ack_error_model is not None else BernoulliLoss(ack_error_rate, rng)
     
     def transmit(self, message):
-        """Transmit a message through the unreliable channel, possibly corrupting it."""
-        if random.random() < self.error_rate:
-            valid_positions = [i for i, char in enumerate(message) if char != '|']
-            position = random.choice(valid_positions)
-            
-            message_chars = list(message)
-            message_chars[position] = chr((ord(message_chars[position]) + 1) % 128)
-            return ''.join(message_chars)
+        """Transmit a serialized segment through the unreliable channel, possibly flipping one of its bits in place."""
+        if self.error_model.lost():
+            position = self.rng.randrange(len(message) * 8)
+            message[position >> 3] ^= 1 << (position & 7)
         return message
     
-    def transmit_acknowledgment(self, ack, error_rate=0.3):
-        """Transmit an acknowledgment with possible loss."""
-        return ack ^ 1 if random.random() < error_rate else ack
+    def transmit_acknowledgment(self, ack):
+        """
+        Transmit an acknowledgment with possible loss or corruption. A corrupted
+        ACK fails its checksum at the sender, so it is returned as None rather
+        than as a different, valid-looking ACK number.
+        """
+        return None if self.ack_error_model.lost() else ack
+
+
+SEGMENT_HEADER = struct.Struct('!IIH')  # sequence number, payload length, checksum
 
 
 def convert_to_bytes(data):
@@ -30,106 +48,109 @@ def convert_to_bytes(data):
         return data.to_bytes(4, byteorder='big')
     elif isinstance(data, str):
         return data.encode('utf-8')
-    elif isinstance(data, bytes):
+    elif isinstance(data, (bytes, bytearray, memoryview)):
         return data
     else:
         raise TypeError("Unsupported data type for checksum calculation")
 
 
 def calculate_integrity_check(sequence_number, payload):
-    """Calculate an integrity check value for the given sequence number and payload."""
-    seq_bytes = sequence_number.to_bytes(1, byteorder='big')
+    """Calculate the 16-bit Internet checksum of a segment: its header (with a zero checksum field) and payload."""
     payload_bytes = convert_to_bytes(payload)
-    combined_bytes = seq_bytes + payload_bytes
-    
-    checksum_value = 0
-    for byte in combined_bytes:
-        checksum_value += byte
-        checksum_value = (checksum_value & 0xFF) + (checksum_value >> 8) 
-    
-    return ~checksum_value & 0xFF
+    payload_length = len(payload_bytes)
+    header_sum = (sequence_number >> 16) + (sequence_number & 0xFFFF) + (payload_length >> 16) + (payload_length & 0xFFFF)
+    return internet_checksum(payload_bytes, header_sum)
 
 
 class DataSegment:
     """A class representing a data segment with sequence number, payload, and integrity check."""
     
-    def __init__(self, sequence_number, payload):
+    def __init__(self, sequence_number, payload, checksum=None):
         self.sequence_number = sequence_number
-        self.payload = payload
-        self.checksum = calculate_integrity_check(sequence_number, payload)
+        self.payload = convert_to_bytes(payload)
+        self.checksum = calculate_integrity_check(sequence_number, self.payload) if checksum is None else checksum
+    
+    def payload_text(self):
+        """Decode the payload for display."""
+        return bytes(self.payload).decode('utf-8', errors='replace')
     
     def serialize(self):
-        """Convert the segment to a string representation."""
-        return f"{self.sequence_number}|{self.payload}|{self.checksum}"
+        """Pack the segment into a fresh bytearray: a fixed binary header followed by the payload."""
+        segment_bytes = bytearray(SEGMENT_HEADER.size + len(self.payload))
+        SEGMENT_HEADER.pack_into(segment_bytes, 0, self.sequence_number, len(self.payload), self.checksum)
+        segment_bytes[SEGMENT_HEADER.size:] = self.payload
+        return segment_bytes
     
     @staticmethod
-    def deserialize(segment_string):
-        """Create a segment from its string representation."""
-        try:
-            parts = segment_string.split('|')
-            sequence_number = int(parts[0])
-            payload = parts[1]
-            received_checksum = int(parts[2])
-            
-            segment = DataSegment(sequence_number, payload)
-            segment.checksum = received_checksum  
-            return segment
-        except Exception as e:
-            print(f"Error parsing segment: {e}")
+    def deserialize(segment_bytes):
+        """Create a segment from its binary representation, keeping the payload as a view into the buffer."""
+        view = memoryview(segment_bytes)
+        if len(view) < SEGMENT_HEADER.size:
+            return None
+        sequence_number, payload_length, received_checksum = SEGMENT_HEADER.unpack_from(view)
+        if payload_length != len(view) - SEGMENT_HEADER.size:
             return None
+        return DataSegment(sequence_number, view[SEGMENT_HEADER.size:], received_checksum)
 
 
 class TransmitterNode:
     """A class representing the sending endpoint in reliable data transfer."""
     
-    def __init__(self):
+    def __init__(self, sink=None):
         self.sequence_number = 0
+        self.sink = sink if sink is not None else events.ConsoleSink()
     
     def transmit(self, payload, receiver, channel):
         """Send data to the receiver with reliability guarantees."""
         segment = DataSegment(self.sequence_number, payload)
         acknowledgment_received = False
+        event = events.SEND
         
         while not acknowledgment_received:
             transmitted_segment = channel.transmit(segment.serialize())
-            print(f"Transmitter: Sending segment with payload: {segment.payload}, sequence number: {self.sequence_number}\n")
+            self.sink.emit(event, "Transmitter", seq=self.sequence_number, payload=segment.payload)
             
             acknowledgment = channel.transmit_acknowledgment(receiver.process_segment(transmitted_segment))
-            print(f"Received acknowledgment: {acknowledgment}")
             
             if acknowledgment is not None and acknowledgment == self.sequence_number:
+                self.sink.emit(events.ACK_RECEIVED, "Transmitter", ack=acknowledgment)
                 self.sequence_number = self.sequence_number ^ 1
                 acknowledgment_received = True
             else:
-                print(f"Transmitter: Retransmitting...\n")
+                self.sink.emit(events.ACK_INVALID, "Transmitter", ack=acknowledgment)
+                event = events.RETRANSMIT
 
 
 class ReceiverNode:
     """A class representing the receiving endpoint in reliable data transfer."""
     
-    def __init__(self):
+    def __init__(self, on_deliver=None, sink=None):
         self.expected_sequence_number = 0
+        self.on_deliver = on_deliver
+        self.sink = sink if sink is not None else events.ConsoleSink()
     
-    def process_segment(self, segment_string):
+    def process_segment(self, segment_bytes):
         """Process a received segment and return appropriate acknowledgment."""
-        segment = DataSegment.deserialize(segment_string)
+        segment = DataSegment.deserialize(segment_bytes)
         
         if segment is None:
-            print(f"Receiver: Segment received is corrupted, sending a dupplicate ACK: {self.expected_sequence_number ^ 1}\n")
+            self.sink.emit(events.CORRUPT, "Receiver", ack=self.expected_sequence_number ^ 1, checksum_ok=False)
             return self.expected_sequence_number ^ 1
         
         calculated_checksum = calculate_integrity_check(segment.sequence_number, segment.payload)
         
         if calculated_checksum != segment.checksum:
-            print(f"Receiver: Checksum mismatch, sending a duplicate ACK: {self.expected_sequence_number ^ 1}\n")
+            self.sink.emit(events.CORRUPT, "Receiver", seq=segment.sequence_number, ack=self.expected_sequence_number ^ 1, checksum_ok=False)
             return self.expected_sequence_number ^ 1
         
         if segment.sequence_number == self.expected_sequence_number:
-            print(f"Receiver: Correct segment, payload: {segment.payload}, transmitting data to the application layer, sending ACK: {segment.sequence_number}\n")
+            self.sink.emit(events.DELIVER, "Receiver", seq=segment.sequence_number, ack=segment.sequence_number, checksum_ok=True, payload=segment.payload)
+            if self.on_deliver is not None:
+                self.on_deliver(segment.payload)
             self.expected_sequence_number ^= 1 
             return segment.sequence_number
         else:
-            print(f"Receiver: Duplicate segment received, resending ACK: {self.expected_sequence_number ^ 1}\n")
+            self.sink.emit(events.DUPLICATE, "Receiver", seq=segment.sequence_number, ack=self.expected_sequence_number ^ 1, checksum_ok=True)
             return self.expected_sequence_number ^ 1
 
 
@@ -138,16 +159,30 @@ if __name__ == "__main__":
     receiver = ReceiverNode()
     channel = NetworkChannel(error_rate=0.2)
 
+    if len(sys.argv) == 3:
+        # python RDT2.2.py <input file> <output file>
+        from rdt_stream import transfer_file
+        transfer_file(sys.argv[1], sys.argv[2], transmitter, receiver, channel)
+        sys.exit()
+
+    # Messages are prompted for on a terminal and read line by line (up to
+    # "done" or end of input) when stdin is a pipe or file.
+    interactive = sys.stdin.isatty()
     messages = []
-    print("Enter your messages and enter done to stop \n")
+    if interactive:
+        print("Enter your messages and enter done to stop \n")
     
     while True:
-        user_input = input("Enter the message:\n")
+        try:
+            user_input = input("Enter the message:\n" if interactive else "")
+        except EOFError:
+            break
         if user_input.lower() == "done":
             break
         messages.append(user_input)
     
-    print("\n")
+    if interactive:
+        print("\n")
     
     for message in messages:
         transmitter.transmit(message, receiver, channel)
\ No newline at end of file
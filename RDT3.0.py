@@ -1,32 +1,174 @@
 # IMPLEMENTATION OF THE RDT 3.0 PROTOCOL
 
+import heapq
+import itertools
 import random
-import time
+import sys
+import struct
+import checkpoint
+from checksum import internet_checksum
+from loss_models import BernoulliLoss
+import events
+
+
+class ScheduledEvent:
+    """A class representing a pending event on the simulation clock that can be cancelled."""
+    
+    __slots__ = ('time', 'callback', 'args', 'cancelled')
+    
+    def __init__(self, time, callback, args):
+        self.time = time
+        self.callback = callback
+        self.args = args
+        self.cancelled = False
+    
+    def cancel(self):
+        """Prevent the event from firing when its time comes."""
+        self.cancelled = True
+
+
+class EventScheduler:
+    """
+    A discrete-event scheduler that advances a virtual clock from one timestamped event to the next.
+    
+    The queue holds bound methods and their arguments, so a scheduler pickles
+    (see checkpoint.py) together with the objects its events belong to.
+    """
+    
+    def __init__(self):
+        self.now = 0.0
+        self._queue = []
+        self._counter = itertools.count()
+    
+    def __getstate__(self):
+        """Save the tie-breaking counter as the next number it would hand out."""
+        state = self.__dict__.copy()
+        state['_counter'] = next(self._counter)
+        return state
+    
+    def __setstate__(self, state):
+        state['_counter'] = itertools.count(state['_counter'])
+        self.__dict__.update(state)
+    
+    def call_later(self, delay, callback, *args):
+        """Schedule callback(*args) to run after delay simulated seconds."""
+        event = ScheduledEvent(self.now + delay, callback, args)
+        heapq.heappush(self._queue, (event.time, next(self._counter), event))
+        return event
+    
+    def run(self, until=None, checkpoint_every=None, checkpoint_path=None, state=None):
+        """
+        Process events in time order until the queue is empty or until() becomes true.
+        
+        With checkpoint_every, state (the object that holds this scheduler and
+        everything its events touch) is saved to checkpoint_path each time the
+        clock is about to pass another checkpoint_every simulated seconds.
+        """
+        if checkpoint_every:
+            return self._run_checkpointed(until, checkpoint_every, checkpoint_path, state)
+        while self._queue:
+            if until is not None and until():
+                return
+            event_time, _, event = heapq.heappop(self._queue)
+            if event.cancelled:
+                continue
+            self.now = event_time
+            event.callback(*event.args)
+    
+    def _run_checkpointed(self, until, checkpoint_every, checkpoint_path, state):
+        """run() with a snapshot between the events on either side of every checkpoint time."""
+        if checkpoint_path is None:
+            raise ValueError("checkpoint_every needs a checkpoint_path")
+        next_checkpoint = self.now + checkpoint_every
+        while self._queue:
+            if until is not None and until():
+                return
+            if self._queue[0][0] >= next_checkpoint:
+                checkpoint.save(state, checkpoint_path)
+                while next_checkpoint <= self._queue[0][0]:
+                    next_checkpoint += checkpoint_every
+            event_time, _, event = heapq.heappop(self._queue)
+            if event.cancelled:
+                continue
+            self.now = event_time
+            event.callback(*event.args)
+
 
 class NetworkChannel:
-    """A class representing an unreliable network channel with configurable error probability."""
+    """
+    A class representing an unreliable network channel with configurable error probability.
     
-    def __init__(self, error_rate=0.2, loss_rate=0.1):
+    Losses and bit errors are decided by loss models (see loss_models.py); by
+    default these are independent Bernoulli trials with the given rates.
+    The reverse path has its own models, so ACKs do not disturb the state
+    of a bursty forward-path model; ACKs sent as checksummed segments go
+    through send_acknowledgment_segment to use them. All random draws,
+    including which bit flips, come from rng.
+    """
+    
+    def __init__(self, error_rate=0.2, loss_rate=0.1, propagation_delay=0.1, ack_error_rate=0.3,
+                 loss_model=None, error_model=None, ack_loss_model=None, ack_error_model=None, rng=random):
         self.error_rate = error_rate
         self.loss_rate = loss_rate
+        self.propagation_delay = propagation_delay
+        self.ack_error_rate = ack_error_rate
+        self.rng = rng
+        self.loss_model = loss_model if loss_model is not None else BernoulliLoss(loss_rate, rng)
+        self.error_model = error_model if error_model is not None else BernoulliLoss(error_rate, rng)
+        self.ack_loss_model = ack_loss_model if ack_loss_model is not None else BernoulliLoss(loss_rate, rng)
+        self.ack_error_model = ack_error_model if ack_error_model is not None else BernoulliLoss(ack_error_rate, rng)
     
     def transmit(self, message):
-        """Transmit a message through the unreliable channel, possibly corrupting or dropping it."""
-        if random.random() < self.loss_rate:
+        """Transmit a serialized segment through the unreliable channel, possibly dropping it or flipping one of its bits in place."""
+        if self.loss_model.lost():
             return None
-        if random.random() < self.error_rate:
-            valid_positions = [i for i, char in enumerate(message) if char != '|']
-            position = random.choice(valid_positions)
-            message_chars = list(message)
-            message_chars[position] = chr((ord(message_chars[position]) + 1) % 128)
-            return ''.join(message_chars)
+        if self.error_model.lost():
+            position = self.rng.randrange(len(message) * 8)
+            message[position >> 3] ^= 1 << (position & 7)
         return message
     
-    def transmit_acknowledgment(self, ack, error_rate=0.3):
-        """Transmit an acknowledgment with possible loss."""
-        if random.random() < self.loss_rate:
+    def transmit_acknowledgment(self, ack):
+        """
+        Transmit an acknowledgment with possible loss or corruption. A corrupted
+        ACK fails its checksum at the sender, so it is returned as None rather
+        than as a different, valid-looking ACK number.
+        """
+        if self.ack_loss_model.lost():
+            return None
+        return None if self.ack_error_model.lost() else ack
+    
+    def transmit_acknowledgment_segment(self, message):
+        """Transmit a serialized ACK segment over the reverse path, possibly dropping it or flipping one of its bits in place."""
+        if self.ack_loss_model.lost():
             return None
-        return ack ^ 1 if random.random() < error_rate else ack
+        if self.ack_error_model.lost():
+            position = self.rng.randrange(len(message) * 8)
+            message[position >> 3] ^= 1 << (position & 7)
+        return message
+    
+    def send(self, scheduler, message, on_arrival):
+        """Transmit a message and schedule its arrival after the propagation delay, unless it is lost."""
+        transmitted = self.transmit(message)
+        if transmitted is not None:
+            scheduler.call_later(self.loss_model.delay(self.propagation_delay), on_arrival, transmitted)
+        return transmitted
+    
+    def send_acknowledgment(self, scheduler, ack, on_arrival):
+        """Transmit an acknowledgment and schedule its arrival after the propagation delay, unless it is lost."""
+        transmitted = self.transmit_acknowledgment(ack)
+        if transmitted is not None:
+            scheduler.call_later(self.ack_loss_model.delay(self.propagation_delay), on_arrival, transmitted)
+        return transmitted
+    
+    def send_acknowledgment_segment(self, scheduler, message, on_arrival):
+        """Transmit an ACK segment over the reverse path and schedule its arrival after the propagation delay, unless it is lost."""
+        transmitted = self.transmit_acknowledgment_segment(message)
+        if transmitted is not None:
+            scheduler.call_later(self.ack_loss_model.delay(self.propagation_delay), on_arrival, transmitted)
+        return transmitted
+
+
+SEGMENT_HEADER = struct.Struct('!IIH')  # sequence number, payload length, checksum
 
 
 def convert_to_bytes(data):
@@ -35,133 +177,483 @@ def convert_to_bytes(data):
         return data.to_bytes(4, byteorder='big')
     elif isinstance(data, str):
         return data.encode('utf-8')
-    elif isinstance(data, bytes):
+    elif isinstance(data, (bytes, bytearray, memoryview)):
         return data
     else:
         raise TypeError("Unsupported data type for checksum calculation")
 
 
 def calculate_integrity_check(sequence_number, payload):
-    """Calculate an integrity check value for the given sequence number and payload."""
-    seq_bytes = sequence_number.to_bytes(1, byteorder='big')
+    """Calculate the 16-bit Internet checksum of a segment: its header (with a zero checksum field) and payload."""
     payload_bytes = convert_to_bytes(payload)
-    combined_bytes = seq_bytes + payload_bytes
-    
-    checksum_value = 0
-    for byte in combined_bytes:
-        checksum_value += byte
-        checksum_value = (checksum_value & 0xFF) + (checksum_value >> 8) 
-    
-    return ~checksum_value & 0xFF
+    payload_length = len(payload_bytes)
+    header_sum = (sequence_number >> 16) + (sequence_number & 0xFFFF) + (payload_length >> 16) + (payload_length & 0xFFFF)
+    return internet_checksum(payload_bytes, header_sum)
 
 
 class DataSegment:
     """A class representing a data segment with sequence number, payload, and integrity check."""
     
-    def __init__(self, sequence_number, payload):
+    def __init__(self, sequence_number, payload, checksum=None):
         self.sequence_number = sequence_number
-        self.payload = payload
-        self.checksum = calculate_integrity_check(sequence_number, payload)
+        self.payload = convert_to_bytes(payload)
+        self.checksum = calculate_integrity_check(sequence_number, self.payload) if checksum is None else checksum
+    
+    def payload_text(self):
+        """Decode the payload for display."""
+        return bytes(self.payload).decode('utf-8', errors='replace')
     
     def serialize(self):
-        """Convert the segment to a string representation."""
-        return f"{self.sequence_number}|{self.payload}|{self.checksum}"
+        """Pack the segment into a fresh bytearray: a fixed binary header followed by the payload."""
+        segment_bytes = bytearray(SEGMENT_HEADER.size + len(self.payload))
+        SEGMENT_HEADER.pack_into(segment_bytes, 0, self.sequence_number, len(self.payload), self.checksum)
+        segment_bytes[SEGMENT_HEADER.size:] = self.payload
+        return segment_bytes
     
     @staticmethod
-    def deserialize(segment_string):
-        """Create a segment from its string representation."""
-        try:
-            parts = segment_string.split('|')
-            sequence_number = int(parts[0])
-            payload = parts[1]
-            received_checksum = int(parts[2])
-            
-            segment = DataSegment(sequence_number, payload)
-            segment.checksum = received_checksum  
-            return segment
-        except Exception as e:
-            print(f"Receiver: Segment received is corrupted, sending a duplicate ACK: {0 ^ 1}\n")
+    def deserialize(segment_bytes):
+        """Create a segment from its binary representation, keeping the payload as a view into the buffer."""
+        view = memoryview(segment_bytes)
+        if len(view) < SEGMENT_HEADER.size:
             return None
+        sequence_number, payload_length, received_checksum = SEGMENT_HEADER.unpack_from(view)
+        if payload_length != len(view) - SEGMENT_HEADER.size:
+            return None
+        return DataSegment(sequence_number, view[SEGMENT_HEADER.size:], received_checksum)
+
+
+class SimulatedTransport:
+    """Carries a sender's segments to a receiver, and the ACKs back, over a NetworkChannel on the simulated clock."""
+    
+    def __init__(self, scheduler, channel, receiver, on_acknowledgment):
+        self.scheduler = scheduler
+        self.channel = channel
+        self.receiver = receiver
+        self.on_acknowledgment = on_acknowledgment
+    
+    def time(self):
+        return self.scheduler.now
+    
+    def call_later(self, delay, callback, *args):
+        return self.scheduler.call_later(delay, callback, *args)
+    
+    def send(self, segment_bytes):
+        """Put a segment on the channel; returns False if the channel dropped it."""
+        return self.channel.send(self.scheduler, segment_bytes, self._segment_arrived) is not None
+    
+    def _segment_arrived(self, segment_bytes):
+        """Hand a segment that survived the channel to the receiver and send its ACK back."""
+        acknowledgment = self.receiver.process_segment(segment_bytes)
+        if self.channel.send_acknowledgment(self.scheduler, acknowledgment, self.on_acknowledgment) is None:
+            self.on_acknowledgment(None)
 
 
 class Sender:
-    """A class representing the sending endpoint in reliable data transfer."""
+    """
+    A class representing the sending endpoint in reliable data transfer.
     
-    def __init__(self):
+    The sender only talks to a transport (send, call_later, time), so the same
+    state machine runs on the simulated clock or over a real socket.
+    """
+    
+    def __init__(self, scheduler=None, timeout=2.0, sink=None):
         self.sequence_number = 0
         self.timer_active = False
+        self.scheduler = scheduler if scheduler is not None else EventScheduler()
+        self.timeout = timeout
+        self.sink = sink if sink is not None else events.ConsoleSink(self.time)
+        self._segment = None
+        self._timer = None
+        self._transport = None
+        self._on_acknowledged = None
+        self._acknowledgment_received = True
+    
+    def time(self):
+        """The clock of the current transport, or of the simulation before anything was sent."""
+        return self._transport.time() if self._transport is not None else self.scheduler.now
     
     def transmit(self, payload, receiver, channel):
-        """Send data to the receiver with reliability guarantees."""
-        segment = DataSegment(self.sequence_number, payload)
-        acknowledgment_received = False
-        
-        while not acknowledgment_received:
-            transmitted_segment = channel.transmit(segment.serialize())
-            print(f"Sender: Sending segment with payload: {segment.payload}, sequence number: {self.sequence_number}\n")
-            
-            if transmitted_segment is not None:
-                acknowledgment = channel.transmit_acknowledgment(receiver.process_segment(transmitted_segment))
-                if acknowledgment is not None and acknowledgment == self.sequence_number:
-                    self.sequence_number = self.sequence_number ^ 1
-                    acknowledgment_received = True
-                    print(f"Sender: ACK received\n")
-                else:
-                    print(f"Sender: No valid ACK received, waiting...\n")
-            else:
-                print(f"Sender: Packet lost, waiting...\n")
-            
-            if not acknowledgment_received:
-                self.timer_active = True
-                time.sleep(2)  # Simulate timer (2 seconds)
-                self.timer_active = False
-                print(f"Sender: Timer expired, retransmitting...\n")
+        """Send data to the receiver with reliability guarantees, advancing the simulated clock until it is acknowledged."""
+        transport = SimulatedTransport(self.scheduler, channel, receiver, self.acknowledgment_arrived)
+        self.start(payload, transport)
+        self.scheduler.run(until=lambda: self._acknowledgment_received)
+    
+    def start(self, payload, transport, on_acknowledged=None):
+        """Begin sending payload over transport; on_acknowledged() is called once it is acknowledged."""
+        self._segment = DataSegment(self.sequence_number, payload)
+        self._transport = transport
+        self._on_acknowledged = on_acknowledged
+        self._acknowledgment_received = False
+        self._send_segment(events.SEND)
+    
+    def _send_segment(self, event):
+        """Put the current segment on the transport and start the retransmission timer."""
+        self.sink.emit(event, "Sender", seq=self.sequence_number, payload=self._segment.payload)
+        self.timer_active = True
+        self._timer = self._transport.call_later(self.timeout, self._timer_expired)
+        if not self._transport.send(self._segment.serialize()):
+            self.sink.emit(events.SEGMENT_LOST, "Sender", seq=self.sequence_number)
+    
+    def acknowledgment_arrived(self, acknowledgment):
+        """Stop the timer on the expected ACK; anything else (None for a corrupted ACK) is ignored until the timer fires."""
+        if self._acknowledgment_received or acknowledgment != self.sequence_number:
+            self.sink.emit(events.ACK_INVALID, "Sender", ack=acknowledgment)
+            return
+        self._timer.cancel()
+        self.timer_active = False
+        self.sequence_number = self.sequence_number ^ 1
+        self._acknowledgment_received = True
+        self.sink.emit(events.ACK_RECEIVED, "Sender", ack=acknowledgment)
+        if self._on_acknowledged is not None:
+            self._on_acknowledged()
+    
+    def _timer_expired(self):
+        """Retransmit the outstanding segment when its timer runs out."""
+        self.timer_active = False
+        self.sink.emit(events.TIMEOUT, "Sender", seq=self.sequence_number)
+        self._send_segment(events.RETRANSMIT)
 
 
 class Receiver:
     """A class representing the receiving endpoint in reliable data transfer."""
     
-    def __init__(self):
+    def __init__(self, on_deliver=None, sink=None):
         self.expected_sequence_number = 0
+        self.on_deliver = on_deliver
+        self.sink = sink if sink is not None else events.ConsoleSink()
     
-    def process_segment(self, segment_string):
+    def process_segment(self, segment_bytes):
         """Process a received segment and return appropriate acknowledgment."""
-        segment = DataSegment.deserialize(segment_string)
+        segment = DataSegment.deserialize(segment_bytes)
         
         if segment is None:
-            print(f"Receiver: Segment received is corrupted, sending a duplicate ACK: {self.expected_sequence_number ^ 1}\n")
+            self.sink.emit(events.CORRUPT, "Receiver", ack=self.expected_sequence_number ^ 1, checksum_ok=False)
             return self.expected_sequence_number ^ 1
         
         calculated_checksum = calculate_integrity_check(segment.sequence_number, segment.payload)
         
         if calculated_checksum != segment.checksum:
-            print(f"Receiver: Checksum mismatch, sending a duplicate ACK: {self.expected_sequence_number ^ 1}\n")
+            self.sink.emit(events.CORRUPT, "Receiver", seq=segment.sequence_number, ack=self.expected_sequence_number ^ 1, checksum_ok=False)
             return self.expected_sequence_number ^ 1
         
         if segment.sequence_number == self.expected_sequence_number:
-            print(f"Receiver: Correct segment, payload: {segment.payload}, transmitting data to the application layer, sending ACK: {segment.sequence_number}\n")
+            self.sink.emit(events.DELIVER, "Receiver", seq=segment.sequence_number, ack=segment.sequence_number, checksum_ok=True, payload=segment.payload)
+            if self.on_deliver is not None:
+                self.on_deliver(segment.payload)
             self.expected_sequence_number ^= 1 
             return segment.sequence_number
         else:
-            print(f"Receiver: Duplicate segment received, resending ACK: {self.expected_sequence_number ^ 1}\n")
+            self.sink.emit(events.DUPLICATE, "Receiver", seq=segment.sequence_number, ack=self.expected_sequence_number ^ 1, checksum_ok=True)
             return self.expected_sequence_number ^ 1
 
 
+class PipelinedSender:
+    """Base class for senders that keep up to window_size unacknowledged segments in flight."""
+    
+    def __init__(self, window_size=4, sequence_bits=8, timeout=2.0, transmission_time=0.001, scheduler=None, sink=None):
+        self.window_size = window_size
+        self.sequence_space = 2 ** sequence_bits
+        self.timeout = timeout
+        self.transmission_time = transmission_time
+        self.scheduler = scheduler if scheduler is not None else EventScheduler()
+        self.sink = sink if sink is not None else events.ConsoleSink(self.time)
+        
+        # base and next_index count segments from the start of the transfer;
+        # the sequence number on the wire is the index modulo the sequence space.
+        self.base = 0
+        self.next_index = 0
+        self.outstanding = {}
+        self.segments_sent = 0
+        self.retransmissions = 0
+        self._busy_time = 0.0
+        self._link_free_at = 0.0
+        self._payloads = None
+        self._payloads_exhausted = True
+        self._receiver = None
+        self._channel = None
+        self._start_time = 0.0
+        self._start_busy_time = 0.0
+    
+    def time(self):
+        return self.scheduler.now
+    
+    def transmit_all(self, payloads, receiver, channel, checkpoint_every=None, checkpoint_path=None):
+        """
+        Send every payload to the receiver and return the transfer statistics.
+        
+        With checkpoint_every, the sender and everything it drives (receiver,
+        channel, scheduler queue and pending timers) are saved to
+        checkpoint_path every checkpoint_every simulated seconds; after a
+        crash, load_checkpoint(checkpoint_path).resume() finishes the
+        transfer. payloads must then be picklable, e.g. a list.
+        """
+        self._payloads = iter(payloads)
+        self._payloads_exhausted = False
+        self._receiver = receiver
+        self._channel = channel
+        self._start_time = self.scheduler.now
+        self._start_busy_time = self._busy_time
+        self._fill_window()
+        return self.resume(checkpoint_every, checkpoint_path)
+    
+    def resume(self, checkpoint_every=None, checkpoint_path=None):
+        """Run the transfer started by transmit_all() to the end and return its statistics."""
+        self.scheduler.run(until=lambda: self._payloads_exhausted and self.base == self.next_index,
+                           checkpoint_every=checkpoint_every, checkpoint_path=checkpoint_path, state=self)
+        elapsed = self.scheduler.now - self._start_time
+        return {
+            'segments_delivered': self._receiver.delivered_segments,
+            'segments_sent': self.segments_sent,
+            'retransmissions': self.retransmissions,
+            'elapsed': elapsed,
+            'goodput': self._receiver.delivered_bytes / elapsed if elapsed > 0 else 0.0,
+            'utilization': (self._busy_time - self._start_busy_time) / elapsed if elapsed > 0 else 0.0,
+        }
+    
+    def save_checkpoint(self, path):
+        """Snapshot the transfer in progress to path (see checkpoint.py)."""
+        checkpoint.save(self, path)
+    
+    @staticmethod
+    def load_checkpoint(path):
+        """Return the sender saved at path; resume() continues its transfer."""
+        return checkpoint.load(path)
+    
+    def _fill_window(self):
+        """Send new segments while the window has room and payloads remain."""
+        while not self._payloads_exhausted and self.next_index < self.base + self.window_size:
+            try:
+                payload = next(self._payloads)
+            except StopIteration:
+                self._payloads_exhausted = True
+                return
+            index = self.next_index
+            self.outstanding[index] = DataSegment(index % self.sequence_space, payload)
+            self.next_index += 1
+            self._on_new_segment(index)
+            self._send_segment(index)
+    
+    def _send_segment(self, index, retransmission=False):
+        """Queue a segment behind any segment still being clocked onto the link."""
+        segment = self.outstanding[index]
+        departure = max(self.scheduler.now, self._link_free_at) + self.transmission_time
+        self._link_free_at = departure
+        self._busy_time += self.transmission_time
+        self.segments_sent += 1
+        if retransmission:
+            self.retransmissions += 1
+        self.sink.emit(events.RETRANSMIT if retransmission else events.SEND, "Sender", seq=segment.sequence_number, payload=segment.payload)
+        self.scheduler.call_later(departure - self.scheduler.now, self._depart, segment)
+    
+    def _depart(self, segment):
+        """Hand a fully transmitted segment to the channel."""
+        if self._channel.send(self.scheduler, segment.serialize(), self._segment_arrived) is None:
+            self.sink.emit(events.SEGMENT_LOST, "Sender", seq=segment.sequence_number)
+    
+    def _segment_arrived(self, segment_bytes):
+        """Deliver a segment to the receiver and send back whatever ACK it produces."""
+        acknowledgment = self._receiver.process_segment(segment_bytes)
+        if acknowledgment is None:
+            return
+        ack_segment = DataSegment(acknowledgment, b"")
+        if self._channel.send_acknowledgment_segment(self.scheduler, ack_segment.serialize(),
+                                                     self._acknowledgment_arrived) is None:
+            self.sink.emit(events.ACK_LOST, "Sender", ack=acknowledgment)
+    
+    def _acknowledgment_arrived(self, ack_bytes):
+        """Validate an ACK segment and pass its absolute index to the protocol-specific handler."""
+        ack_segment = DataSegment.deserialize(ack_bytes)
+        if ack_segment is None or calculate_integrity_check(ack_segment.sequence_number, ack_segment.payload) != ack_segment.checksum:
+            self.sink.emit(events.ACK_INVALID, "Sender", checksum_ok=False)
+            return
+        offset = (ack_segment.sequence_number - self.base) % self.sequence_space
+        if self.base + offset >= self.next_index:
+            self.sink.emit(events.OUT_OF_WINDOW, "Sender", ack=ack_segment.sequence_number, checksum_ok=True)
+            return
+        self._on_acknowledgment(self.base + offset)
+        self._fill_window()
+    
+    def _on_new_segment(self, index):
+        raise NotImplementedError
+    
+    def _on_acknowledgment(self, index):
+        raise NotImplementedError
+
+
+class GoBackNSender(PipelinedSender):
+    """A Go-Back-N sender: cumulative ACKs and a single timer for the oldest unacknowledged segment."""
+    
+    def __init__(self, window_size=4, sequence_bits=8, timeout=2.0, transmission_time=0.001, scheduler=None, sink=None):
+        if window_size >= 2 ** sequence_bits:
+            raise ValueError("Go-Back-N requires window_size < 2 ** sequence_bits")
+        super().__init__(window_size, sequence_bits, timeout, transmission_time, scheduler, sink)
+        self._timer = None
+    
+    def _restart_timer(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if self.base < self.next_index:
+            self._timer = self.scheduler.call_later(self.timeout, self._timer_expired)
+    
+    def _on_new_segment(self, index):
+        if index == self.base:
+            self._restart_timer()
+    
+    def _on_acknowledgment(self, index):
+        self.sink.emit(events.ACK_RECEIVED, "Sender", ack=index % self.sequence_space, checksum_ok=True)
+        for acknowledged in range(self.base, index + 1):
+            del self.outstanding[acknowledged]
+        self.base = index + 1
+        self._restart_timer()
+    
+    def _timer_expired(self):
+        self._timer = None
+        self.sink.emit(events.TIMEOUT, "Sender", seq=self.base % self.sequence_space)
+        self._restart_timer()
+        for index in range(self.base, self.next_index):
+            self._send_segment(index, retransmission=True)
+
+
+class SelectiveRepeatSender(PipelinedSender):
+    """A Selective Repeat sender: individual ACKs and one timer per outstanding segment."""
+    
+    def __init__(self, window_size=4, sequence_bits=8, timeout=2.0, transmission_time=0.001, scheduler=None, sink=None):
+        if 2 * window_size > 2 ** sequence_bits:
+            raise ValueError("Selective Repeat requires window_size <= 2 ** sequence_bits / 2")
+        super().__init__(window_size, sequence_bits, timeout, transmission_time, scheduler, sink)
+        self._timers = {}
+        self._acknowledged = set()
+    
+    def _on_new_segment(self, index):
+        self._timers[index] = self.scheduler.call_later(self.timeout, self._timer_expired, index)
+    
+    def _on_acknowledgment(self, index):
+        if index in self._acknowledged:
+            return
+        self.sink.emit(events.ACK_RECEIVED, "Sender", ack=index % self.sequence_space, checksum_ok=True)
+        self._acknowledged.add(index)
+        self._timers.pop(index).cancel()
+        while self.base in self._acknowledged:
+            self._acknowledged.remove(self.base)
+            del self.outstanding[self.base]
+            self.base += 1
+    
+    def _timer_expired(self, index):
+        self.sink.emit(events.TIMEOUT, "Sender", seq=index % self.sequence_space)
+        self._timers[index] = self.scheduler.call_later(self.timeout, self._timer_expired, index)
+        self._send_segment(index, retransmission=True)
+
+
+class GoBackNReceiver:
+    """A Go-Back-N receiver: accepts only the next in-order segment and ACKs the last one it delivered."""
+    
+    def __init__(self, sequence_bits=8, on_deliver=None, sink=None):
+        self.sequence_space = 2 ** sequence_bits
+        self.on_deliver = on_deliver
+        self.sink = sink if sink is not None else events.ConsoleSink()
+        self.expected_sequence_number = 0
+        self.delivered_segments = 0
+        self.delivered_bytes = 0
+    
+    def process_segment(self, segment_bytes):
+        """Process a received segment and return the cumulative acknowledgment."""
+        last_in_order = (self.expected_sequence_number - 1) % self.sequence_space
+        segment = DataSegment.deserialize(segment_bytes)
+        
+        if segment is None or calculate_integrity_check(segment.sequence_number, segment.payload) != segment.checksum:
+            self.sink.emit(events.CORRUPT, "Receiver", ack=last_in_order, checksum_ok=False)
+            return last_in_order
+        
+        if segment.sequence_number != self.expected_sequence_number:
+            self.sink.emit(events.OUT_OF_ORDER, "Receiver", seq=segment.sequence_number, ack=last_in_order, checksum_ok=True)
+            return last_in_order
+        
+        self.sink.emit(events.DELIVER, "Receiver", seq=segment.sequence_number, ack=segment.sequence_number, checksum_ok=True, payload=segment.payload)
+        self.delivered_segments += 1
+        self.delivered_bytes += len(segment.payload)
+        if self.on_deliver is not None:
+            self.on_deliver(segment.payload)
+        self.expected_sequence_number = (self.expected_sequence_number + 1) % self.sequence_space
+        return segment.sequence_number
+
+
+class SelectiveRepeatReceiver:
+    """A Selective Repeat receiver: buffers out-of-order segments inside its window and ACKs each one."""
+    
+    def __init__(self, window_size=4, sequence_bits=8, on_deliver=None, sink=None):
+        self.window_size = window_size
+        self.on_deliver = on_deliver
+        self.sink = sink if sink is not None else events.ConsoleSink()
+        self.sequence_space = 2 ** sequence_bits
+        self.receive_base = 0
+        self.buffer = {}
+        self.delivered_segments = 0
+        self.delivered_bytes = 0
+    
+    def process_segment(self, segment_bytes):
+        """Process a received segment and return its individual acknowledgment, or None if it must be ignored."""
+        segment = DataSegment.deserialize(segment_bytes)
+        
+        if segment is None or calculate_integrity_check(segment.sequence_number, segment.payload) != segment.checksum:
+            self.sink.emit(events.CORRUPT, "Receiver", checksum_ok=False)
+            return None
+        
+        offset = (segment.sequence_number - self.receive_base) % self.sequence_space
+        if offset < self.window_size:
+            self.buffer.setdefault(segment.sequence_number, segment.payload)
+            self.sink.emit(events.BUFFERED, "Receiver", seq=segment.sequence_number, ack=segment.sequence_number, checksum_ok=True)
+            self._deliver_in_order()
+            return segment.sequence_number
+        if offset >= self.sequence_space - self.window_size:
+            self.sink.emit(events.DUPLICATE, "Receiver", seq=segment.sequence_number, ack=segment.sequence_number, checksum_ok=True)
+            return segment.sequence_number
+        self.sink.emit(events.OUT_OF_WINDOW, "Receiver", seq=segment.sequence_number, checksum_ok=True)
+        return None
+    
+    def _deliver_in_order(self):
+        """Pass the contiguous run of buffered segments at the window base up to the application layer."""
+        while self.receive_base in self.buffer:
+            payload = self.buffer.pop(self.receive_base)
+            self.sink.emit(events.DELIVER, "Receiver", seq=self.receive_base, payload=payload)
+            self.delivered_segments += 1
+            self.delivered_bytes += len(payload)
+            if self.on_deliver is not None:
+                self.on_deliver(payload)
+            self.receive_base = (self.receive_base + 1) % self.sequence_space
+
+
 if __name__ == "__main__":
     Sender = Sender()
     receiver = Receiver()
     channel = NetworkChannel(error_rate=0.2, loss_rate=0.1)
 
+    if len(sys.argv) == 3:
+        # python RDT3.0.py <input file> <output file>
+        from rdt_stream import transfer_file
+        transfer_file(sys.argv[1], sys.argv[2], Sender, receiver, channel)
+        sys.exit()
+
+    # Messages are prompted for on a terminal and read line by line (up to
+    # "done" or end of input) when stdin is a pipe or file.
+    interactive = sys.stdin.isatty()
     messages = []
-    print("Enter your messages and enter done to stop \n")
+    if interactive:
+        print("Enter your messages and enter done to stop \n")
     
     while True:
-        user_input = input("Enter the message:\n")
+        try:
+            user_input = input("Enter the message:\n" if interactive else "")
+        except EOFError:
+            break
         if user_input.lower() == "done":
             break
         messages.append(user_input)
     
-    print("\n")
+    if interactive:
+        print("\n")
     
     for message in messages:
-        Sender.transmit(message, receiver, channel)
\ No newline at end of file
+        Sender.transmit(message, receiver, channel)
+    
+    print(f"Simulated time elapsed: {Sender.scheduler.now:.3f} s")
\ No newline at end of file
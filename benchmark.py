@@ -0,0 +1,178 @@
+# BENCHMARK SUITE WITH REGRESSION TRACKING FOR THE FOUR PROTOCOL SIMULATORS
+
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+from events import NullSink
+from script_loader import load_script
+
+SEED = 2024
+
+
+def counting_channel(channel_class, *args):
+    """Instantiate a channel that counts the segments put on it, retransmissions included."""
+    class CountingChannel(channel_class):
+        transmissions = 0
+
+        def transmit(self, message):
+            self.transmissions += 1
+            return super().transmit(message)
+
+    return CountingChannel(*args)
+
+
+def tcp_scenario(algorithm, max_rtt, loss_interval):
+    # Imports happen here, outside the timed region.
+    if algorithm == "tahoe":
+        from TCP_TAHOE import TCPTahoe as simulator
+    else:
+        from TCP_RENO import TCPReno as simulator
+
+    def run():
+        sim = simulator(mss=1, initial_ssthresh=8, max_rtt=max_rtt, loss_interval=loss_interval)
+        sim.run()
+        return max_rtt
+    return f"tcp_{algorithm}_rtt{max_rtt}_li{loss_interval}", "rtt_steps_per_second", run
+
+
+def trace_scenario(mode, rtts):
+    from tcp_trace import TraceRecorder
+
+    def run():
+        trace = TraceRecorder(rtts, ("slow_start", "congestion_avoidance", "timeout"), mode)
+        for rtt in range(rtts):
+            trace.record(rtt + 0.5, 8.0, rtt % 3)
+        len(trace)
+        return rtts
+    return f"trace_{mode}_rtt{rtts}", "rtt_records_per_second", run
+
+
+def rdt22_scenario(messages, error_rate):
+    rdt = load_script('rdt22')
+
+    def run():
+        transmitter = rdt.TransmitterNode(sink=NullSink())
+        receiver = rdt.ReceiverNode(sink=NullSink())
+        channel = counting_channel(rdt.NetworkChannel, error_rate)
+        for i in range(messages):
+            transmitter.transmit(f"message {i}", receiver, channel)
+        return channel.transmissions
+    return f"rdt22_msgs{messages}_err{error_rate}", "segments_per_second", run
+
+
+def rdt30_scenario(messages, error_rate, loss_rate):
+    rdt = load_script('rdt30')
+
+    def run():
+        sender = rdt.Sender(sink=NullSink())
+        receiver = rdt.Receiver(sink=NullSink())
+        channel = counting_channel(rdt.NetworkChannel, error_rate, loss_rate)
+        for i in range(messages):
+            sender.transmit(f"message {i}", receiver, channel)
+        return channel.transmissions
+    return f"rdt30_msgs{messages}_err{error_rate}_loss{loss_rate}", "segments_per_second", run
+
+
+def scenarios(quick=False):
+    """Every benchmark as a (name, unit, run) triple; run() returns the amount of work done."""
+    tcp_scales = (10_000,) if quick else (10_000, 100_000)
+    rdt_scales = (1_000,) if quick else (1_000, 10_000)
+    suite = []
+    for max_rtt in tcp_scales:
+        for loss_interval in (8, 15):
+            suite.append(tcp_scenario("tahoe", max_rtt, loss_interval))
+            suite.append(tcp_scenario("reno", max_rtt, loss_interval))
+        for mode in ("full", "ring"):
+            suite.append(trace_scenario(mode, max_rtt))
+    for messages in rdt_scales:
+        for error_rate in (0.0, 0.2, 0.5):
+            suite.append(rdt22_scenario(messages, error_rate))
+        for error_rate, loss_rate in ((0.0, 0.0), (0.2, 0.1), (0.3, 0.3)):
+            suite.append(rdt30_scenario(messages, error_rate, loss_rate))
+    return suite
+
+
+def measure(run, repeats):
+    """Best-of-repeats wall time, work done, and peak traced memory of a separate run."""
+    best = float('inf')
+    for _ in range(repeats):
+        random.seed(SEED)
+        started = time.perf_counter()
+        work = run()
+        best = min(best, time.perf_counter() - started)
+
+    random.seed(SEED)
+    tracemalloc.start()
+    try:
+        run()
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return best, work, peak_memory
+
+
+def run_suite(quick=False, repeats=3, name_filter=None):
+    results = {}
+    for name, unit, run in scenarios(quick):
+        if name_filter and name_filter not in name:
+            continue
+        seconds, work, peak_memory = measure(run, repeats)
+        results[name] = {
+            'unit': unit,
+            'rate': work / seconds,
+            'seconds': seconds,
+            'peak_memory_bytes': peak_memory,
+        }
+        print(f"{name:40s} {work / seconds:14.0f} {unit:22s} {peak_memory / 1e6:8.2f} MB")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return the names of scenarios whose rate fell more than threshold below the baseline."""
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        change = result['rate'] / baseline[name]['rate'] - 1
+        marker = ""
+        if change < -threshold:
+            regressions.append(name)
+            marker = "  REGRESSION"
+        print(f"{name:40s} {change:+8.1%}{marker}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the RDT and TCP simulators")
+    parser.add_argument("--quick", action="store_true", help="only the smallest scale of each scenario")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--filter", help="only run scenarios whose name contains this string")
+    parser.add_argument("--save", metavar="PATH", help="write the results as the new baseline")
+    parser.add_argument("--compare", metavar="PATH", help="baseline to check the results against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="fail if a rate drops by more than this fraction (default 0.10)")
+    args = parser.parse_args(argv)
+
+    results = run_suite(args.quick, args.repeats, args.filter)
+
+    if args.save:
+        with open(args.save, 'w') as baseline_file:
+            json.dump(results, baseline_file, indent=2, sort_keys=True)
+        print(f"Baseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+        print()
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} scenario(s) slower than the baseline by more than {args.threshold:.0%}")
+            sys.exit(1)
+        print("No regressions")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+# COMPACT, ATOMIC SNAPSHOTS OF SIMULATOR STATE
+
+import copyreg
+import io
+import os
+import pickle
+import random
+import sys
+import tempfile
+import zlib
+
+import script_loader
+
+CHECKPOINT_VERSION = 1
+
+
+def _reduce_memoryview(view):
+    return bytes, (view.tobytes(),)
+
+
+class _Pickler(pickle.Pickler):
+    """
+    Stores the global random module by reference and remembers that it was
+    used. The zero-copy payload views of received segments are saved as
+    bytes, which they come back as.
+    """
+
+    uses_global_random = False
+    dispatch_table = {**copyreg.dispatch_table, memoryview: _reduce_memoryview}
+
+    def persistent_id(self, obj):
+        if obj is random:
+            self.uses_global_random = True
+            return "random"
+        return None
+
+
+class _Unpickler(pickle.Unpickler):
+    """Imports RDT2.2.py / RDT3.0.py under their module names before restoring their classes."""
+
+    def find_class(self, module, name):
+        if module not in sys.modules and script_loader.is_script(module):
+            script_loader.load_script(module)
+        return super().find_class(module, name)
+
+    def persistent_load(self, pid):
+        if pid == "random":
+            return random
+        raise pickle.UnpicklingError(f"Unknown persistent id: {pid}")
+
+
+def dumps(state, level=6):
+    """
+    Serialize state as a zlib-compressed pickle. random.Random instances are
+    pickled with their state; objects that draw from the global random
+    module keep drawing from it after loading, and the checkpoint carries
+    the module's state so the stream continues where it left off.
+    """
+    buffer = io.BytesIO()
+    pickler = _Pickler(buffer, protocol=pickle.HIGHEST_PROTOCOL)
+    pickler.dump(state)
+    global_state = random.getstate() if pickler.uses_global_random else None
+    return zlib.compress(pickle.dumps((CHECKPOINT_VERSION, global_state, buffer.getvalue()),
+                                      protocol=pickle.HIGHEST_PROTOCOL), level)
+
+
+def loads(data):
+    """Inverse of dumps(). Restores the global random state if the snapshot used it."""
+    version, global_state, payload = pickle.loads(zlib.decompress(data))
+    if version != CHECKPOINT_VERSION:
+        raise ValueError(f"Unsupported checkpoint version: {version}")
+    state = _Unpickler(io.BytesIO(payload)).load()
+    if global_state is not None:
+        random.setstate(global_state)
+    return state
+
+
+def save(state, path):
+    """
+    Write a checkpoint atomically: it goes to a temporary file in the same
+    directory, is flushed to disk, and then replaces path, so a crash
+    mid-write leaves the previous checkpoint intact.
+    """
+    data = dumps(state)
+    directory = os.path.dirname(os.path.abspath(path))
+    descriptor, temporary = tempfile.mkstemp(dir=directory, prefix=".checkpoint-")
+    try:
+        with os.fdopen(descriptor, 'wb') as checkpoint_file:
+            checkpoint_file.write(data)
+            checkpoint_file.flush()
+            os.fsync(checkpoint_file.fileno())
+        os.replace(temporary, path)
+    except BaseException:
+        os.unlink(temporary)
+        raise
+
+
+def load(path):
+    with open(path, 'rb') as checkpoint_file:
+        return loads(checkpoint_file.read())
@@ -0,0 +1,73 @@
+# RFC 1071 INTERNET CHECKSUM SHARED BY THE RDT IMPLEMENTATIONS
+
+
+def fold(value):
+    """Fold carries above bit 16 back into the low 16 bits (one's-complement addition)."""
+    while value >> 16:
+        value = (value & 0xFFFF) + (value >> 16)
+    return value
+
+
+def ones_complement_sum(data, initial=0):
+    """
+    16-bit one's-complement sum of data read as big-endian words (an odd
+    trailing byte is padded with zero), added to initial.
+
+    Instead of a Python loop over words, the whole buffer is read as one
+    big-endian integer: since 2**16 == 1 (mod 0xFFFF), its residue modulo
+    0xFFFF is the one's-complement sum of its 16-bit words, and CPython
+    computes both steps over machine words in C.
+    """
+    value = int.from_bytes(data, 'big')
+    if len(data) & 1:
+        value <<= 8
+    total = value % 0xFFFF
+    if total == 0 and value:
+        # One's-complement arithmetic has two zeros; a non-zero sum folds to 0xFFFF.
+        total = 0xFFFF
+    return fold(total + initial)
+
+
+def internet_checksum(data, initial=0):
+    """RFC 1071 checksum of data, continuing from the one's-complement sum initial."""
+    return ~ones_complement_sum(data, initial) & 0xFFFF
+
+
+def verify(data):
+    """True if data, with its checksum field filled in, sums to 0xFFFF."""
+    return ones_complement_sum(data) == 0xFFFF
+
+
+def update_checksum(checksum, old_bytes, new_bytes):
+    """
+    Incrementally update a checksum after a header field changes from
+    old_bytes to new_bytes (RFC 1624, eqn. 3), without touching the payload.
+    """
+    old_sum = ones_complement_sum(old_bytes)
+    return ~fold((~checksum & 0xFFFF) + (~old_sum & 0xFFFF) + ones_complement_sum(new_bytes)) & 0xFFFF
+
+
+def _word_sums(buffers):
+    """One's-complement sums of many buffers at once, as a NumPy uint64 array."""
+    import numpy as np
+
+    padded_length = max((len(buffer) for buffer in buffers), default=0)
+    padded_length += padded_length & 1
+    matrix = np.zeros((len(buffers), padded_length), dtype=np.uint8)
+    for row, buffer in enumerate(buffers):
+        matrix[row, :len(buffer)] = np.frombuffer(buffer, dtype=np.uint8)
+
+    sums = matrix.view('>u2').sum(axis=1, dtype=np.uint64)
+    while (sums >> 16).any():
+        sums = (sums & 0xFFFF) + (sums >> 16)
+    return sums
+
+
+def checksum_batch(buffers):
+    """RFC 1071 checksums of a list of buffers, computed together with NumPy."""
+    return ~_word_sums(buffers).astype('u2')
+
+
+def verify_batch(buffers):
+    """Boolean NumPy array telling which buffers carry a valid checksum."""
+    return _word_sums(buffers) == 0xFFFF
@@ -0,0 +1,282 @@
+# CONGESTION CONTROLLERS FOR THE PER-RTT TCP SIMULATIONS
+
+import math
+
+SLOW_START, CONGESTION_AVOIDANCE = 0, 1
+
+
+class CongestionController:
+    """
+    Base class of the congestion control algorithms. The simulation calls
+    exactly one of on_ack, on_loss (triple duplicate ACK) or on_timeout per
+    RTT; each updates cwnd and ssthresh and returns the phase code of that
+    RTT, an index into PHASES.
+
+    on_ack receives the segments delivered during the RTT (in cwnd units)
+    and the RTT it took; the loss-based algorithms ignore both.
+    """
+
+    name = None
+    PHASES = ()
+    LOSS_PHASES = ()
+    # Whether the simulation must tell timeouts from triple duplicate ACKs;
+    # when False it does not draw the kind of loss at all.
+    distinguishes_timeouts = True
+
+    def __init__(self, mss, initial_ssthresh):
+        self.mss = mss
+        self.cwnd = mss
+        self.ssthresh = initial_ssthresh
+
+    def on_ack(self, delivered, rtt):
+        raise NotImplementedError
+
+    def on_loss(self):
+        raise NotImplementedError
+
+    def on_timeout(self):
+        raise NotImplementedError
+
+
+class Tahoe(CongestionController):
+    """Slow start and congestion avoidance; every loss resets cwnd to 1 MSS."""
+
+    name = "tahoe"
+    LOSS_EVENT = 2
+    PHASES = ("Slow start", "Congestion avoidance", "Loss event")
+    LOSS_PHASES = (LOSS_EVENT,)
+    distinguishes_timeouts = False
+
+    def on_ack(self, delivered, rtt):
+        if self.cwnd < self.ssthresh:
+            # Slow start : exponential increase
+            self.cwnd *= 2
+            return SLOW_START
+        # Congestion Avoidance : additive increase
+        self.cwnd += self.mss
+        return CONGESTION_AVOIDANCE
+
+    def on_loss(self):
+        # Multiplicative decrease : ssthresh = cwnd/2 and cwnd is reset to 1
+        self.ssthresh = self.cwnd / 2
+        self.cwnd = self.mss
+        return self.LOSS_EVENT
+
+    on_timeout = on_loss
+
+
+class Reno(CongestionController):
+    """Tahoe plus fast recovery: a triple duplicate ACK halves cwnd instead of resetting it."""
+
+    name = "reno"
+    FAST_RECOVERY, TIMEOUT = 2, 3
+    PHASES = ("Slow Start", "Congestion Avoidance", "Fast Recovery", "Timeout")
+    LOSS_PHASES = (FAST_RECOVERY, TIMEOUT)
+
+    def __init__(self, mss, initial_ssthresh):
+        super().__init__(mss, initial_ssthresh)
+        self.in_fast_recovery = False
+
+    def on_ack(self, delivered, rtt):
+        if self.in_fast_recovery:
+            phase = CONGESTION_AVOIDANCE
+            self.cwnd += self.mss
+            if self.cwnd >= self.ssthresh:
+                self.in_fast_recovery = False
+        elif self.cwnd < self.ssthresh:
+            phase = SLOW_START
+            self.cwnd *= 2
+        else:
+            phase = CONGESTION_AVOIDANCE
+            self.cwnd += self.mss
+        self.cwnd = max(self.cwnd, self.mss)
+        return phase
+
+    def on_loss(self):
+        self.ssthresh = max(self.cwnd / 2, 2 * self.mss)
+        self.cwnd = max(self.cwnd / 2, self.mss)
+        self.in_fast_recovery = True
+        return self.FAST_RECOVERY
+
+    def on_timeout(self):
+        self.ssthresh = max(self.cwnd / 2, 2 * self.mss)
+        self.cwnd = self.mss
+        self.in_fast_recovery = False
+        return self.TIMEOUT
+
+
+class NewReno(Reno):
+    """
+    Reno with RFC 6582 partial-ACK handling: recovery ends with cwnd at the
+    new ssthresh, and further losses from the same window (the next RTT) do
+    not cut cwnd again.
+    """
+
+    name = "newreno"
+
+    def on_ack(self, delivered, rtt):
+        if self.in_fast_recovery:
+            self.in_fast_recovery = False
+            self.cwnd = self.ssthresh
+            return CONGESTION_AVOIDANCE
+        return super().on_ack(delivered, rtt)
+
+    def on_loss(self):
+        if self.in_fast_recovery:
+            self.in_fast_recovery = False
+            return self.FAST_RECOVERY
+        self.ssthresh = max(self.cwnd / 2, 2 * self.mss)
+        self.cwnd = self.ssthresh
+        self.in_fast_recovery = True
+        return self.FAST_RECOVERY
+
+
+class Cubic(CongestionController):
+    """
+    CUBIC (RFC 8312): after a loss the window follows
+    W(t) = C (t - K)^3 + W_max, in segments with t in seconds, never growing
+    slower than the Reno-friendly estimate. Reaching congestion avoidance
+    without a loss starts an epoch at the current window with K = 0
+    (section 4.8), and an ACK never shrinks the window.
+    """
+
+    name = "cubic"
+    LOSS, TIMEOUT = 2, 3
+    PHASES = ("Slow Start", "Cubic Growth", "Loss", "Timeout")
+    LOSS_PHASES = (LOSS, TIMEOUT)
+    C = 0.4
+    BETA = 0.7
+
+    def __init__(self, mss, initial_ssthresh):
+        super().__init__(mss, initial_ssthresh)
+        self.w_max = 0.0
+        self.epoch = 0.0
+        self.k = 0.0
+        self.in_epoch = False
+
+    def _start_epoch(self, loss=True):
+        """Start an epoch at the current window; without a loss K = 0, so growth resumes at once."""
+        self.w_max = self.cwnd / self.mss
+        self.epoch = 0.0
+        self.k = (self.w_max * (1 - self.BETA) / self.C) ** (1 / 3) if loss else 0.0
+        self.in_epoch = True
+
+    def on_ack(self, delivered, rtt):
+        if self.cwnd < self.ssthresh:
+            self.cwnd *= 2
+            return SLOW_START
+        if not self.in_epoch:
+            self._start_epoch(loss=False)
+        self.epoch += rtt
+        cubic = self.C * (self.epoch - self.k) ** 3 + self.w_max
+        friendly = self.w_max * self.BETA + 3 * (1 - self.BETA) / (1 + self.BETA) * self.epoch / rtt
+        self.cwnd = max(cubic, friendly, self.cwnd / self.mss) * self.mss
+        return CONGESTION_AVOIDANCE
+
+    def on_loss(self):
+        self._start_epoch()
+        self.cwnd = max(self.cwnd * self.BETA, self.mss)
+        self.ssthresh = max(self.cwnd, 2 * self.mss)
+        return self.LOSS
+
+    def on_timeout(self):
+        self._start_epoch()
+        self.ssthresh = max(self.cwnd * self.BETA, 2 * self.mss)
+        self.cwnd = self.mss
+        return self.TIMEOUT
+
+
+class BBR(CongestionController):
+    """
+    A simplified BBR: the window is a gain times the estimated
+    bandwidth-delay product, from the best delivery rate of the last
+    BANDWIDTH_WINDOW RTTs and the smallest RTT seen. It starts up at gain
+    2/ln 2 until the bandwidth stops growing, drains the queue it built,
+    then cycles through the PROBE_BW gains. As in BBRv2, a loss caps the
+    window at BETA times the level it happened at, and every RTT spent
+    probing upward raises the cap by 1 MSS. A timeout falls back to 1 MSS
+    until the next ACK.
+
+    ssthresh reports the estimated bandwidth-delay product.
+    """
+
+    name = "bbr"
+    DRAIN, PROBE_BANDWIDTH, LOSS, TIMEOUT = 1, 2, 3, 4
+    PHASES = ("Startup", "Drain", "Probe Bandwidth", "Loss", "Timeout")
+    LOSS_PHASES = (LOSS, TIMEOUT)
+    BETA = 0.7
+    STARTUP_GAIN = 2 / math.log(2)
+    PROBE_GAINS = (1.25, 0.75, 1, 1, 1, 1, 1, 1)
+    BANDWIDTH_WINDOW = 10
+
+    def __init__(self, mss, initial_ssthresh):
+        super().__init__(mss, initial_ssthresh)
+        self.state = SLOW_START
+        self.rates = []
+        self.min_rtt = math.inf
+        self.full_bandwidth = 0.0
+        self.rounds_without_growth = 0
+        self.cycle = 0
+        self.inflight_cap = math.inf
+
+    def bandwidth_delay_product(self):
+        return max(self.rates) * self.min_rtt if self.rates else self.cwnd
+
+    def on_ack(self, delivered, rtt):
+        self.rates = (self.rates + [delivered / rtt])[-self.BANDWIDTH_WINDOW:]
+        self.min_rtt = min(self.min_rtt, rtt)
+        bdp = self.bandwidth_delay_product()
+        self.ssthresh = bdp
+        phase = self.state
+
+        if self.state == SLOW_START:
+            bandwidth = max(self.rates)
+            if bandwidth >= self.full_bandwidth * 1.25:
+                self.full_bandwidth = bandwidth
+                self.rounds_without_growth = 0
+            else:
+                self.rounds_without_growth += 1
+            if self.rounds_without_growth >= 3:
+                self.state = self.DRAIN
+            gain = self.STARTUP_GAIN
+        elif self.state == self.DRAIN:
+            self.state = self.PROBE_BANDWIDTH
+            gain = 1 / self.STARTUP_GAIN
+        else:
+            gain = self.PROBE_GAINS[self.cycle]
+            self.cycle = (self.cycle + 1) % len(self.PROBE_GAINS)
+        if gain > 1:
+            self.inflight_cap += self.mss
+        self.cwnd = min(max(gain * bdp, 4 * self.mss), self.inflight_cap)
+        return phase
+
+    def on_loss(self):
+        self.inflight_cap = max(self.cwnd * self.BETA, 4 * self.mss)
+        self.cwnd = self.inflight_cap
+        if self.state == SLOW_START:
+            self.state = self.DRAIN
+        return self.LOSS
+
+    def on_timeout(self):
+        self.on_loss()
+        self.cwnd = self.mss
+        return self.TIMEOUT
+
+
+CONTROLLERS = {controller.name: controller for controller in (Tahoe, Reno, NewReno, Cubic, BBR)}
+
+
+def register(controller_class):
+    """Make a CongestionController subclass available by its name; usable as a class decorator."""
+    CONTROLLERS[controller_class.name] = controller_class
+    return controller_class
+
+
+def create(name, mss, initial_ssthresh):
+    """Instantiate the registered controller called name."""
+    try:
+        controller_class = CONTROLLERS[name]
+    except KeyError:
+        raise ValueError(f"Unknown congestion control algorithm: {name}") from None
+    return controller_class(mss, initial_ssthresh)
+
@@ -0,0 +1,218 @@
+# STRUCTURED EVENT LOGGING FOR THE RDT SENDERS AND RECEIVERS
+
+import json
+import struct
+import time
+
+(SEND, RETRANSMIT, SEGMENT_LOST, ACK_RECEIVED, ACK_INVALID, ACK_LOST, TIMEOUT,
+ DELIVER, CORRUPT, DUPLICATE, OUT_OF_ORDER, BUFFERED, OUT_OF_WINDOW) = range(13)
+
+EVENT_NAMES = ("send", "retransmit", "segment_lost", "ack_received", "ack_invalid", "ack_lost", "timeout",
+               "deliver", "corrupt", "duplicate", "out_of_order", "buffered", "out_of_window")
+
+NODES = ("Sender", "Transmitter", "Receiver")
+
+# time, node, event, sequence number, ACK number, checksum result (-1 stands for "not applicable")
+EVENT_RECORD = struct.Struct('<dBBqqb')
+
+
+def render(event, node, seq=None, ack=None, checksum_ok=None, payload=None, now=None):
+    """Format an event as the human-readable protocol log line."""
+    if payload is not None:
+        payload = bytes(payload).decode('utf-8', errors='replace')
+    if event == SEND:
+        return f"{node}: Sending segment with payload: {payload}, sequence number: {seq}"
+    if event == RETRANSMIT:
+        return f"{node}: Retransmitting segment with payload: {payload}, sequence number: {seq}"
+    if event == SEGMENT_LOST:
+        return f"{node}: Segment {seq} lost, waiting..."
+    if event == ACK_RECEIVED:
+        return f"{node}: ACK {ack} received"
+    if event == ACK_INVALID:
+        if ack is None:
+            return f"{node}: No valid ACK received, waiting..."
+        return f"{node}: Unexpected ACK {ack} received, waiting..."
+    if event == ACK_LOST:
+        return f"{node}: ACK {ack} lost"
+    if event == TIMEOUT:
+        at = f" at t={now:.3f}s" if now is not None else ""
+        return f"{node}: Timer expired{at}, retransmitting from sequence number {seq}..."
+    if event == DELIVER:
+        acknowledgment = f", sending ACK: {ack}" if ack is not None else ""
+        return f"{node}: Correct segment, payload: {payload}, transmitting data to the application layer{acknowledgment}"
+    if event == CORRUPT:
+        problem = "Segment received is corrupted" if seq is None else "Checksum mismatch"
+        response = f"sending a duplicate ACK: {ack}" if ack is not None else "no ACK sent"
+        return f"{node}: {problem}, {response}"
+    if event == DUPLICATE:
+        return f"{node}: Duplicate segment {seq} received, resending ACK: {ack}"
+    if event == OUT_OF_ORDER:
+        return f"{node}: Out-of-order segment {seq} discarded, resending ACK: {ack}"
+    if event == BUFFERED:
+        return f"{node}: Segment {seq} buffered, sending ACK: {ack}"
+    if event == OUT_OF_WINDOW:
+        if seq is None:
+            return f"{node}: ACK {ack} outside the window, ignoring"
+        return f"{node}: Segment {seq} outside the window, ignoring"
+    raise ValueError(f"Unknown event: {event}")
+
+
+class NullSink:
+    """Discards every event without formatting anything."""
+
+    enabled = False
+
+    def emit(self, event, node, seq=None, ack=None, checksum_ok=None, payload=None):
+        pass
+
+    def close(self):
+        pass
+
+
+class CountingSink:
+    """Counts events by code without formatting them; counts() maps event names to totals."""
+
+    enabled = True
+
+    def __init__(self):
+        self.totals = [0] * len(EVENT_NAMES)
+
+    def emit(self, event, node, seq=None, ack=None, checksum_ok=None, payload=None):
+        self.totals[event] += 1
+
+    def counts(self):
+        return {name: total for name, total in zip(EVENT_NAMES, self.totals)}
+
+    def close(self):
+        pass
+
+
+class ConsoleSink:
+    """Prints the human-readable protocol log, as the simulators always have."""
+
+    enabled = True
+
+    def __init__(self, clock=None):
+        self.clock = clock
+
+    def emit(self, event, node, seq=None, ack=None, checksum_ok=None, payload=None):
+        now = self.clock() if self.clock is not None else None
+        print(render(event, node, seq, ack, checksum_ok, payload, now) + "\n")
+
+    def close(self):
+        pass
+
+
+class _BufferedFileSink:
+    """Common buffering for the file sinks: records are written out buffer_size at a time."""
+
+    enabled = True
+    mode = 'w'
+
+    def __init__(self, path, clock=None, buffer_size=4096):
+        self.file = open(path, self.mode)
+        self.clock = clock if clock is not None else time.perf_counter
+        self.buffer_size = buffer_size
+        self.pending = 0
+
+    def _written(self):
+        self.pending += 1
+        if self.pending >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        self.pending = 0
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class JsonlSink(_BufferedFileSink):
+    """Writes one JSON object per event: timestamp, node, event type, seq, ack and checksum result."""
+
+    def __init__(self, path, clock=None, buffer_size=4096):
+        super().__init__(path, clock, buffer_size)
+        self.lines = []
+
+    def emit(self, event, node, seq=None, ack=None, checksum_ok=None, payload=None):
+        self.lines.append(json.dumps({'time': self.clock(), 'node': node, 'event': EVENT_NAMES[event],
+                                      'seq': seq, 'ack': ack, 'checksum_ok': checksum_ok}))
+        self._written()
+
+    def flush(self):
+        if self.lines:
+            self.file.write("\n".join(self.lines) + "\n")
+            self.lines = []
+        super().flush()
+
+
+class BinarySink(_BufferedFileSink):
+    """Writes fixed-size EVENT_RECORD structs; read them back with read_binary_events()."""
+
+    mode = 'wb'
+
+    def __init__(self, path, clock=None, buffer_size=4096):
+        super().__init__(path, clock, buffer_size)
+        self.records = bytearray()
+
+    def emit(self, event, node, seq=None, ack=None, checksum_ok=None, payload=None):
+        self.records += EVENT_RECORD.pack(
+            self.clock(), NODES.index(node), event,
+            -1 if seq is None else seq, -1 if ack is None else ack,
+            -1 if checksum_ok is None else int(checksum_ok))
+        self._written()
+
+    def flush(self):
+        if self.records:
+            self.file.write(self.records)
+            self.records = bytearray()
+        super().flush()
+
+
+class ColumnarSink:
+    """
+    Streams events into a columnar trace directory (see trace_store.py):
+    time, node, event, seq, ack and checksum_ok columns, with -1 standing
+    for "not applicable" as in EVENT_RECORD. Open it with
+    trace_store.ColumnarReader to slice it.
+    """
+
+    enabled = True
+    COLUMNS = {'time': '<f8', 'node': 'u1', 'event': 'u1', 'seq': '<i8', 'ack': '<i8', 'checksum_ok': 'i1'}
+
+    def __init__(self, directory, clock=None, chunk_size=65536, format="npy"):
+        from trace_store import ColumnarWriter
+        self.clock = clock if clock is not None else time.perf_counter
+        self.writer = ColumnarWriter(directory, self.COLUMNS, chunk_size, format,
+                                     attributes={'nodes': list(NODES), 'events': list(EVENT_NAMES)})
+
+    def emit(self, event, node, seq=None, ack=None, checksum_ok=None, payload=None):
+        self.writer.append(self.clock(), NODES.index(node), event,
+                           -1 if seq is None else seq, -1 if ack is None else ack,
+                           -1 if checksum_ok is None else int(checksum_ok))
+
+    def close(self):
+        self.writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_binary_events(path):
+    """Yield the events of a BinarySink file as dictionaries."""
+    with open(path, 'rb') as stream:
+        data = stream.read()
+    for now, node, event, seq, ack, checksum_ok in EVENT_RECORD.iter_unpack(data):
+        yield {'time': now, 'node': NODES[node], 'event': EVENT_NAMES[event],
+               'seq': None if seq < 0 else seq, 'ack': None if ack < 0 else ack,
+               'checksum_ok': None if checksum_ok < 0 else bool(checksum_ok)}
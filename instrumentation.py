@@ -0,0 +1,323 @@
+# OPT-IN COUNTERS, STAGE TIMERS, HISTOGRAMS AND PROFILERS FOR THE SIMULATORS
+
+import collections
+import functools
+import inspect
+import io
+import sys
+import threading
+import time
+
+import events
+
+PROFILERS = ("cprofile", "sampling")
+
+
+class Instrumentation:
+    """
+    Collects named counters, per-stage call counts and wall times, and
+    histograms, and prints them as one report at the end of a run.
+
+    Stages are timed by attach(), which swaps a function or method for a
+    timing wrapper and puts the original back on detach(). Nothing in the
+    simulators checks for instrumentation, so a run that never attaches
+    anything pays nothing at all.
+    """
+
+    def __init__(self):
+        self.counters = collections.Counter()
+        self.timers = {}
+        self.histograms = {}
+        self._attached = []
+
+    def count(self, name, amount=1):
+        self.counters[name] += amount
+
+    def observe(self, name, value, amount=1):
+        """Add amount observations of value to the histogram called name."""
+        histogram = self.histograms.get(name)
+        if histogram is None:
+            histogram = self.histograms[name] = collections.Counter()
+        histogram[value] += amount
+
+    def timed(self, name, function):
+        """Return a wrapper of function that adds every call and its wall time to the stage called name."""
+        timer = self.timers.setdefault(name, [0, 0])
+        clock = time.perf_counter_ns
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            started = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                timer[0] += 1
+                timer[1] += clock() - started
+        return wrapper
+
+    def attach(self, owner, attribute, name=None):
+        """Time every call of owner.attribute (a module function or a class's method) as a stage."""
+        original = inspect.getattr_static(owner, attribute)
+        name = name or f"{getattr(owner, '__name__', owner)}.{attribute}"
+        if isinstance(original, staticmethod):
+            replacement = staticmethod(self.timed(name, original.__func__))
+        elif isinstance(original, classmethod):
+            replacement = classmethod(self.timed(name, original.__func__))
+        else:
+            replacement = self.timed(name, original)
+        setattr(owner, attribute, replacement)
+        self._attached.append((owner, attribute, original))
+
+    def attach_stages(self, stages):
+        for owner, attribute, name in stages:
+            self.attach(owner, attribute, name)
+
+    def detach(self):
+        """Restore every attached function, most recent first."""
+        while self._attached:
+            owner, attribute, original = self._attached.pop()
+            setattr(owner, attribute, original)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.detach()
+
+    def record_phases(self, trace):
+        """
+        Add a TCP trace's number of RTTs in each phase (histogram "RTTs in
+        phase") and the length, in RTTs, of every uninterrupted stretch of
+        each phase ("<phase> episode length"). Both count RTTs rather than
+        seconds, so per-RTT and packet-level runs with different RTTs add up
+        in the same units.
+        """
+        phases = trace.phase_codes()
+        if not len(phases):
+            return
+        import numpy as np
+        # A decimated trace keeps one entry every `decimation` RTTs.
+        rtts_per_entry = getattr(trace, 'decimation', 1)
+        for code, total in enumerate(np.bincount(phases, minlength=len(trace.phase_names))):
+            if total:
+                self.observe("RTTs in phase", trace.phase_names[code], int(total) * rtts_per_entry)
+        boundaries = np.flatnonzero(np.diff(phases)) + 1
+        starts = np.concatenate(([0], boundaries))
+        lengths = np.diff(np.concatenate((starts, [len(phases)])))
+        for code, length in zip(phases[starts].tolist(), lengths.tolist()):
+            self.observe(f"{trace.phase_names[code]} episode length", length * rtts_per_entry)
+
+    def report(self, file=None):
+        """Print counters, stages (slowest first) and histograms."""
+        file = file if file is not None else sys.stdout
+        if self.counters:
+            print("Counters", file=file)
+            for name, value in sorted(self.counters.items()):
+                print(f"  {name:32s} {value:12d}", file=file)
+        timers = sorted(((name, calls, total) for name, (calls, total) in self.timers.items() if calls),
+                        key=lambda timer: -timer[2])
+        if timers:
+            width = max(32, max(len(name) for name, _, _ in timers))
+            print("Stages (inclusive wall time)", file=file)
+            print(f"  {'stage':{width}s} {'calls':>12s} {'total s':>10s} {'mean us':>10s}", file=file)
+            for name, calls, total in timers:
+                print(f"  {name:{width}s} {calls:12d} {total / 1e9:10.4f} {total / calls / 1000:10.3f}", file=file)
+        for name, histogram in self.histograms.items():
+            print(f"Histogram: {name}", file=file)
+            rows = _histogram_rows(histogram)
+            observations = sum(amount for _, amount in rows)
+            largest = max(amount for _, amount in rows)
+            width = max(len(label) for label, _ in rows)
+            for label, amount in rows:
+                bar = "#" * max(1, round(40 * amount / largest))
+                amount_text = f"{amount:12d}" if isinstance(amount, int) else f"{amount:12.3f}"
+                print(f"  {label:>{width}s} {amount_text} {100 * amount / observations:6.2f}% {bar}", file=file)
+
+
+def _histogram_rows(histogram, bins=20):
+    """
+    (label, amount) rows of a histogram: named values in the order they were
+    first seen, numbers in increasing order, grouped into `bins` equal
+    ranges when there are more distinct numbers than that.
+    """
+    if any(isinstance(value, str) for value in histogram):
+        return [(str(value), amount) for value, amount in histogram.items()]
+    values = sorted(histogram)
+    if len(values) <= bins:
+        return [(str(value), histogram[value]) for value in values]
+    low, high = values[0], values[-1]
+    step = -(-(high - low + 1) // bins) if isinstance(low, int) and isinstance(high, int) else (high - low) / bins
+    grouped = collections.Counter()
+    for value in values:
+        grouped[min(int((value - low) // step), bins - 1)] += histogram[value]
+    rows = []
+    for index in sorted(grouped):
+        start = low + index * step
+        end = start + step - 1 if isinstance(step, int) else start + step
+        rows.append((f"{start}-{end}" if isinstance(step, int) else f"{start:.4g}-{end:.4g}", grouped[index]))
+    return rows
+
+
+def tcp_stages():
+    """The stages of the per-RTT TCP simulations that attach_stages() times."""
+    from loss_models import BernoulliLoss, GilbertElliottLoss
+    from tcp_simulation import TCPSimulation
+    from tcp_trace import TraceRecorder
+    return [
+        (TCPSimulation, '_simulate', "simulate"),
+        (BernoulliLoss, 'lost', "loss_model.lost"),
+        (GilbertElliottLoss, 'lost', "loss_model.lost"),
+        (TraceRecorder, 'record', "trace.record"),
+    ]
+
+
+def rdt_stages(*modules):
+    """
+    The per-segment stages of the given RDT modules (rdt22 and rdt30 by
+    default): checksums, (de)serialization and the channel's loss and
+    corruption path.
+    """
+    if not modules:
+        from script_loader import load_script
+        modules = (load_script('rdt22'), load_script('rdt30'))
+    stages = []
+    for module in modules:
+        prefix = module.__name__
+        stages += [
+            (module, 'calculate_integrity_check', f"{prefix}.calculate_integrity_check"),
+            (module.DataSegment, 'serialize', f"{prefix}.serialize"),
+            (module.DataSegment, 'deserialize', f"{prefix}.deserialize"),
+            (module.NetworkChannel, 'transmit', f"{prefix}.channel.transmit"),
+            (module.NetworkChannel, 'transmit_acknowledgment', f"{prefix}.channel.transmit_acknowledgment"),
+        ]
+    return stages
+
+
+class InstrumentedSink:
+    """
+    An event sink that counts every event and builds the histogram of
+    retransmissions per segment, then passes the event on to another sink.
+    A segment's count is closed when its sequence number is sent anew, or
+    at close() for segments still open.
+    """
+
+    enabled = True
+
+    def __init__(self, instruments, sink=None):
+        self.instruments = instruments
+        self.sink = sink if sink is not None else events.NullSink()
+        self.retransmissions = {}
+
+    def emit(self, event, node, seq=None, ack=None, checksum_ok=None, payload=None):
+        self.instruments.counters[events.EVENT_NAMES[event]] += 1
+        if event == events.SEND:
+            if seq in self.retransmissions:
+                self.instruments.observe("retransmissions per segment", self.retransmissions[seq])
+            self.retransmissions[seq] = 0
+        elif event == events.RETRANSMIT:
+            self.retransmissions[seq] = self.retransmissions.get(seq, 0) + 1
+        if self.sink.enabled:
+            self.sink.emit(event, node, seq, ack, checksum_ok, payload)
+
+    def close(self):
+        for retransmissions in self.retransmissions.values():
+            self.instruments.observe("retransmissions per segment", retransmissions)
+        self.retransmissions.clear()
+        self.sink.close()
+
+
+class SamplingProfiler:
+    """
+    A statistical profiler: a background thread looks at the profiled
+    thread's stack every interval seconds and counts the function on top
+    (self time) and every function on the stack (inclusive time).
+    """
+
+    def __init__(self, interval=0.001):
+        self.interval = interval
+        self.self_samples = collections.Counter()
+        self.total_samples = collections.Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self, thread_id):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(thread_id)
+            if frame is None:
+                continue
+            self.samples += 1
+            self.self_samples[_frame_name(frame)] += 1
+            seen = set()
+            while frame is not None:
+                name = _frame_name(frame)
+                if name not in seen:
+                    seen.add(name)
+                    self.total_samples[name] += 1
+                frame = frame.f_back
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, args=(threading.get_ident(),), daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def report(self, file=None, limit=20):
+        file = file if file is not None else sys.stdout
+        print(f"Sampling profile: {self.samples} samples every {self.interval * 1000:g} ms", file=file)
+        print(f"  {'self %':>7s} {'total %':>7s}  function", file=file)
+        for name, count in self.self_samples.most_common(limit):
+            print(f"  {100 * count / self.samples:7.2f} {100 * self.total_samples[name] / self.samples:7.2f}  {name}",
+                  file=file)
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})"
+
+
+class Profiler:
+    """Runs cProfile or the sampling profiler between start() and stop(), and prints its top functions."""
+
+    def __init__(self, kind="cprofile", interval=0.001, limit=20):
+        if kind not in PROFILERS:
+            raise ValueError(f"Unknown profiler: {kind}")
+        self.kind = kind
+        self.limit = limit
+        if kind == "cprofile":
+            import cProfile
+            self.profiler = cProfile.Profile()
+        else:
+            self.profiler = SamplingProfiler(interval)
+
+    def start(self):
+        if self.kind == "cprofile":
+            self.profiler.enable()
+        else:
+            self.profiler.start()
+
+    def stop(self):
+        if self.kind == "cprofile":
+            self.profiler.disable()
+        else:
+            self.profiler.stop()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def report(self, file=None):
+        file = file if file is not None else sys.stdout
+        if self.kind == "cprofile":
+            import pstats
+            output = io.StringIO()
+            pstats.Stats(self.profiler, stream=output).sort_stats("cumulative").print_stats(self.limit)
+            print(output.getvalue().strip("\n"), file=file)
+        else:
+            self.profiler.report(file, self.limit)
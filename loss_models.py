@@ -0,0 +1,141 @@
+# PACKET LOSS MODELS FOR THE CHANNELS AND THE TCP SIMULATIONS
+
+import random
+
+# One record per packet: lost flag and one-way delay in seconds.
+TRACE_FIELDS = [('lost', 'u1'), ('delay', '<f4')]
+
+
+class LossModel:
+    """
+    Decides, packet by packet, whether an impairment hits. lost() is called
+    once per packet in transmission order; delay() then gives that packet's
+    one-way delay. The channels also use these models for bit errors, where
+    lost() means "corrupted".
+    """
+
+    def lost(self):
+        raise NotImplementedError
+
+    def delay(self, default):
+        return default
+
+
+class BernoulliLoss(LossModel):
+    """Independent losses with a fixed probability, drawing one rng.random() per packet."""
+
+    def __init__(self, probability, rng=random):
+        self.probability = probability
+        self.rng = rng
+
+    def lost(self):
+        return self.rng.random() < self.probability
+
+
+class GilbertElliottLoss(LossModel):
+    """
+    Bursty losses from a two-state Markov chain. Before each packet the
+    channel moves from the good to the bad state with probability
+    p_good_to_bad, or back with probability p_bad_to_good; the packet is then
+    lost with loss_good or loss_bad depending on the state.
+    """
+
+    def __init__(self, p_good_to_bad, p_bad_to_good, loss_good=0.0, loss_bad=1.0, rng=random):
+        self.p_good_to_bad = p_good_to_bad
+        self.p_bad_to_good = p_bad_to_good
+        self.loss_good = loss_good
+        self.loss_bad = loss_bad
+        self.rng = rng
+        self.bad = False
+
+    @classmethod
+    def from_statistics(cls, loss_rate, mean_burst_length, rng=random):
+        """
+        The Gilbert model (loss_good=0, loss_bad=1) with the given average
+        loss rate and average number of consecutive losses. Raises
+        ValueError unless 0 <= loss_rate < 1 and mean_burst_length >= 1, or
+        when the loss rate is too high for bursts that short.
+        """
+        if not 0 <= loss_rate < 1:
+            raise ValueError(f"loss_rate must be in [0, 1), got {loss_rate}")
+        if mean_burst_length < 1:
+            raise ValueError(f"mean_burst_length must be at least 1, got {mean_burst_length}")
+        p_bad_to_good = 1 / mean_burst_length
+        p_good_to_bad = loss_rate * p_bad_to_good / (1 - loss_rate)
+        if p_good_to_bad > 1 + 1e-9:
+            raise ValueError(f"a loss rate of {loss_rate} needs bursts of at least "
+                             f"{loss_rate / (1 - loss_rate):g} losses on average, got {mean_burst_length}")
+        p_good_to_bad = min(p_good_to_bad, 1.0)
+        return cls(p_good_to_bad, p_bad_to_good, rng=rng)
+
+    def stationary_loss_rate(self):
+        """The long-run fraction of packets lost."""
+        total = self.p_good_to_bad + self.p_bad_to_good
+        if total == 0:
+            return self.loss_bad if self.bad else self.loss_good
+        bad_share = self.p_good_to_bad / total
+        return bad_share * self.loss_bad + (1 - bad_share) * self.loss_good
+
+    def lost(self):
+        if self.rng.random() < (self.p_bad_to_good if self.bad else self.p_good_to_bad):
+            self.bad = not self.bad
+        return self.rng.random() < (self.loss_bad if self.bad else self.loss_good)
+
+
+class TraceReplayLoss(LossModel):
+    """
+    Replays a recorded per-packet trace of (lost, delay) records. The trace
+    is memory-mapped and read block by block, so traces far larger than
+    memory can be replayed; it starts over at the end when loop is true and
+    raises EOFError otherwise. A NaN delay means "use the channel's default".
+    """
+
+    def __init__(self, path, loop=True, block_size=65536, start=0):
+        import numpy as np
+        self.trace = np.load(path, mmap_mode='r')
+        if self.trace.dtype != np.dtype(TRACE_FIELDS):
+            raise ValueError(f"{path} is not a loss trace: expected fields {TRACE_FIELDS}, got {self.trace.dtype}")
+        if len(self.trace) == 0:
+            raise ValueError(f"{path} is an empty loss trace")
+        self.loop = loop
+        self.block_size = block_size
+        self.position = start % len(self.trace)
+        self._block_start = None
+        self._lost = []
+        self._delays = []
+        self._delay = float('nan')
+
+    def __len__(self):
+        return len(self.trace)
+
+    def _load_block(self):
+        block = self.trace[self.position:self.position + self.block_size]
+        self._block_start = self.position
+        self._lost = block['lost'].tolist()
+        self._delays = block['delay'].tolist()
+
+    def lost(self):
+        if self.position >= len(self.trace):
+            if not self.loop:
+                raise EOFError("Loss trace exhausted")
+            self.position = 0
+        offset = self.position - self._block_start if self._block_start is not None else -1
+        if not 0 <= offset < len(self._lost):
+            self._load_block()
+            offset = 0
+        self.position += 1
+        self._delay = self._delays[offset]
+        return bool(self._lost[offset])
+
+    def delay(self, default):
+        return default if self._delay != self._delay else self._delay
+
+
+def write_trace(path, lost, delay=None):
+    """Save per-packet loss flags (and optional one-way delays in seconds) as a trace for TraceReplayLoss."""
+    import numpy as np
+    lost = np.asarray(lost)
+    trace = np.empty(len(lost), dtype=TRACE_FIELDS)
+    trace['lost'] = lost
+    trace['delay'] = np.nan if delay is None else delay
+    np.save(path, trace)
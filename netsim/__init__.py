@@ -0,0 +1,7 @@
+# IMPORTABLE PACKAGE AND SINGLE COMMAND LINE FOR THE RDT AND TCP SIMULATORS
+#
+# The simulators stay in their own top-level modules; this package gives the
+# protocol scripts importable names (netsim.rdt22 is RDT2.2.py, netsim.rdt30
+# is RDT3.0.py, netsim.tahoe and netsim.reno are TCP_TAHOE.py and
+# TCP_RENO.py) and holds the batch runner (netsim.scenarios) and the CLI,
+# `python -m netsim`. Nothing is imported until it is used.
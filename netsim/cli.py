@@ -0,0 +1,210 @@
+# ONE COMMAND LINE FOR EVERY SIMULATOR: python -m netsim <command> ...
+
+import argparse
+import contextlib
+import importlib
+import sys
+
+# Commands handled by an existing module's main(argv).
+FORWARDED = {
+    "compare": ("tcp_simulation", "compare congestion controllers on the built-in link profiles"),
+    "sweep": ("tcp_sweep", "parallel parameter sweep of the per-RTT TCP model"),
+    "montecarlo": ("tcp_montecarlo", "many Tahoe/Reno runs at once with NumPy"),
+    "bottleneck": ("tcp_bottleneck", "thousands of flows sharing one bottleneck link"),
+    "packet": ("tcp_packet", "packet-level TCP Reno"),
+    "udp": ("rdt_udp", "RDT 3.0 over real UDP sockets"),
+    "benchmark": ("benchmark", "benchmark suite with regression tracking"),
+    "trace": ("trace_store", "inspect a columnar trace directory"),
+    "summary": ("tcp_cache", "cached per-RTT TCP summary compared with the Mathis formula"),
+}
+
+
+def add_instrumentation_options(parser):
+    from instrumentation import PROFILERS
+    parser.add_argument("--instrument", action="store_true",
+                        help="time the simulator stages and report counters and histograms at the end")
+    parser.add_argument("--profiler", choices=PROFILERS, help="profile the run with cProfile or the sampling profiler")
+
+
+@contextlib.contextmanager
+def instrumented(args, stages):
+    """
+    Attach stage timers and start a profiler as the flags ask, and print
+    their reports to stderr (keeping stdout parseable) once the body is
+    done. Without the flags nothing is attached or imported.
+    """
+    instruments = profiler = None
+    if args.instrument:
+        from instrumentation import Instrumentation
+        instruments = Instrumentation()
+        instruments.attach_stages(stages())
+    if args.profiler:
+        from instrumentation import Profiler
+        profiler = Profiler(args.profiler)
+        profiler.start()
+    try:
+        yield instruments
+    finally:
+        if profiler is not None:
+            profiler.stop()
+        if instruments is not None:
+            instruments.detach()
+    if instruments is not None:
+        print(file=sys.stderr)
+        instruments.report(sys.stderr)
+    if profiler is not None:
+        print(file=sys.stderr)
+        profiler.report(sys.stderr)
+
+
+def tcp_stages():
+    from instrumentation import tcp_stages
+    return tcp_stages()
+
+
+def rdt_stages():
+    from instrumentation import rdt_stages
+    return rdt_stages()
+
+
+def all_stages():
+    return tcp_stages() + rdt_stages()
+
+
+def tcp_command(argv):
+    import congestion
+    from tcp_simulation import LINK_PROFILES
+    from netsim.scenarios import build_tcp
+    parser = argparse.ArgumentParser(prog="netsim tcp", description="Run one per-RTT TCP simulation")
+    parser.add_argument("--algorithm", choices=sorted(congestion.CONTROLLERS), default="reno")
+    parser.add_argument("--mss", type=int, default=1)
+    parser.add_argument("--ssthresh", type=int, default=8)
+    parser.add_argument("--max-rtt", type=int, default=50)
+    parser.add_argument("--loss-interval", type=int, default=15)
+    parser.add_argument("--loss-probability", type=float, default=0.02, help="random loss probability per RTT")
+    parser.add_argument("--loss-kind", choices=("timeout", "triple_duplicate_ack"),
+                        help="make every loss this kind instead of drawing it")
+    parser.add_argument("--profile", choices=sorted(LINK_PROFILES), help="use a built-in link profile")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--log", type=int, default=15, help="number of trace rows to print")
+    parser.add_argument("--plot", help="save the plot to this image file")
+    parser.add_argument("--show", action="store_true", help="show the plot in a window")
+    parser.add_argument("--checkpoint", help="checkpoint file; resumed from if it exists")
+    parser.add_argument("--checkpoint-every", type=int, default=10000, help="RTTs between checkpoints")
+    add_instrumentation_options(parser)
+    args = parser.parse_args(argv)
+
+    import os
+    if args.checkpoint and os.path.exists(args.checkpoint):
+        from tcp_simulation import TCPSimulation
+        sim = TCPSimulation.load_checkpoint(args.checkpoint)
+        print(f"Resuming at RTT {sim.rtt_count} from {args.checkpoint}")
+    else:
+        scenario = {"algorithm": args.algorithm, "mss": args.mss, "ssthresh": args.ssthresh,
+                    "max_rtt": args.max_rtt, "loss_interval": args.loss_interval, "seed": args.seed,
+                    "loss_probability": args.loss_probability, "loss_kind": args.loss_kind}
+        if args.profile:
+            scenario["profile"] = args.profile
+        sim = build_tcp(scenario)
+    with instrumented(args, tcp_stages) as instruments:
+        if args.checkpoint:
+            sim.run(args.checkpoint_every, args.checkpoint)
+        else:
+            sim.run()
+        if instruments is not None:
+            instruments.record_phases(sim.trace)
+    sim.print_log(max_entries=args.log)
+    print(f"\nThroughput: {sim.throughput():.3f} segments per RTT")
+    if args.plot:
+        sim.plot_result(args.plot)
+    if args.show:
+        sim.plot_result()
+
+
+def rdt_command(argv):
+    from netsim.scenarios import RDT_PROTOCOLS, run_rdt
+    parser = argparse.ArgumentParser(prog="netsim rdt", description="Send messages or a file over an RDT protocol")
+    parser.add_argument("--protocol", choices=RDT_PROTOCOLS, default="rdt30")
+    parser.add_argument("--message", action="append", dest="messages", help="a message to send (repeatable)")
+    parser.add_argument("--count", type=int, help="send this many generated messages")
+    parser.add_argument("--input", help="file to send")
+    parser.add_argument("--output", help="where the received file is written")
+    parser.add_argument("--error-rate", type=float, default=0.2)
+    parser.add_argument("--loss-rate", type=float, default=0.1)
+    parser.add_argument("--window-size", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--events", help="write the event log to this JSONL file")
+    parser.add_argument("--verbose", action="store_true", help="print every protocol event")
+    add_instrumentation_options(parser)
+    args = parser.parse_args(argv)
+
+    scenario = {"protocol": args.protocol, "error_rate": args.error_rate, "loss_rate": args.loss_rate,
+                "window_size": args.window_size, "seed": args.seed, "events": args.events}
+    if args.input:
+        scenario.update(input=args.input, output=args.output)
+    else:
+        scenario["messages"] = args.messages if args.messages else (args.count if args.count is not None else 10)
+    if args.verbose:
+        scenario["verbose"] = True
+    with instrumented(args, rdt_stages) as instruments:
+        result = run_rdt(scenario, instruments)
+    for name, value in result.items():
+        print(f"{name}: {value}")
+
+
+def run_command(argv):
+    from netsim.scenarios import load_config, run_batch, write_results
+    parser = argparse.ArgumentParser(prog="netsim run", description="Run every scenario in TOML/YAML config files")
+    parser.add_argument("configs", nargs="+")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--output", help="write JSON lines here instead of stdout")
+    add_instrumentation_options(parser)
+    args = parser.parse_args(argv)
+
+    scenarios = [scenario for path in args.configs for scenario in load_config(path)]
+    with instrumented(args, all_stages) as instruments:
+        results = run_batch(scenarios, args.workers, instruments)
+        if args.output:
+            with open(args.output, 'w') as output:
+                write_results(results, output)
+        else:
+            write_results(results, sys.stdout)
+
+
+COMMANDS = {
+    "tcp": (tcp_command, "one per-RTT TCP simulation (any controller)"),
+    "rdt": (rdt_command, "messages or a file over RDT 2.2, RDT 3.0, Go-Back-N or Selective Repeat"),
+    "run": (run_command, "batch scenarios from TOML/YAML config files"),
+}
+
+
+def usage():
+    lines = ["usage: python -m netsim <command> [options]", "", "commands:"]
+    for name, (_, description) in COMMANDS.items():
+        lines.append(f"  {name:12s}{description}")
+    for name, (_, description) in FORWARDED.items():
+        lines.append(f"  {name:12s}{description}")
+    lines.append("")
+    lines.append("Run python -m netsim <command> --help for the options of a command.")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    """
+    Dispatch to a command. Only the modules the chosen command needs are
+    imported, so startup stays fast and matplotlib is loaded only when a
+    plot is requested.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        return
+    command, rest = argv[0], argv[1:]
+    if command in COMMANDS:
+        return COMMANDS[command][0](rest)
+    if command in FORWARDED:
+        module = importlib.import_module(FORWARDED[command][0])
+        sys.argv[0] = f"netsim {command}"
+        return module.main(rest)
+    print(usage(), file=sys.stderr)
+    sys.exit(f"\nUnknown command: {command}")
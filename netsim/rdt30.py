@@ -0,0 +1,7 @@
+# RDT3.0.py UNDER AN IMPORTABLE NAME: THIS MODULE IS THE SAME OBJECT AS script_loader.load_script('rdt30')
+
+import sys
+
+from script_loader import load_script
+
+sys.modules[__name__] = load_script('rdt30')
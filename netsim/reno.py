@@ -0,0 +1,7 @@
+# TCP_RENO.py UNDER THE PACKAGE: THIS MODULE IS THE SAME OBJECT AS TCP_RENO
+
+import sys
+
+import TCP_RENO
+
+sys.modules[__name__] = TCP_RENO
@@ -0,0 +1,202 @@
+# BATCH SCENARIOS: LOAD THEM FROM TOML/YAML AND RUN THEM IN ONE PROCESS
+
+import json
+import os
+import random
+import time
+
+SCENARIO_KINDS = ("tcp", "rdt", "packet")
+RDT_PROTOCOLS = ("rdt22", "rdt30", "gbn", "sr")
+
+
+def load_config(path):
+    """
+    Read a TOML (.toml) or YAML (.yaml/.yml) file holding a list of
+    [[scenarios]] tables and an optional [defaults] table merged into each
+    of them. A scenario with a `seeds` list is expanded into one scenario
+    per seed. YAML needs PyYAML; TOML uses the standard library.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".toml":
+        import tomllib
+        with open(path, 'rb') as config_file:
+            config = tomllib.load(config_file)
+    elif extension in (".yaml", ".yml"):
+        import yaml
+        with open(path) as config_file:
+            config = yaml.safe_load(config_file) or {}
+    else:
+        raise ValueError(f"Unknown config format: {path} (expected .toml, .yaml or .yml)")
+
+    defaults = config.get("defaults", {})
+    scenarios = []
+    for index, entry in enumerate(config.get("scenarios", [])):
+        scenario = dict(defaults, **entry)
+        scenario.setdefault("name", f"scenario-{index}")
+        seeds = scenario.pop("seeds", None)
+        if seeds is None:
+            scenarios.append(scenario)
+        else:
+            scenarios.extend(dict(scenario, seed=seed) for seed in seeds)
+    return scenarios
+
+
+def build_tcp(scenario):
+    """The TCPSimulation described by a tcp scenario, not yet run."""
+    import congestion
+    from tcp_simulation import TCPSimulation, LinkProfile, LINK_PROFILES
+    if "profile" in scenario:
+        link = LINK_PROFILES[scenario["profile"]]
+    else:
+        link = LinkProfile(rtt=scenario.get("rtt", 1), loss_probability=scenario.get("loss_probability", 0.02),
+                           loss_interval=scenario.get("loss_interval", 15), capacity=scenario.get("capacity"),
+                           buffer=scenario.get("buffer", 0), loss_kind=scenario.get("loss_kind"))
+    controller = congestion.create(scenario.get("algorithm", "reno"), scenario.get("mss", 1), scenario.get("ssthresh", 8))
+    return TCPSimulation(controller, scenario.get("max_rtt", 50), link, rng=random.Random(scenario.get("seed", 0)))
+
+
+def run_tcp(scenario, instruments=None):
+    sim = build_tcp(scenario)
+    sim.run()
+    if instruments is not None:
+        instruments.record_phases(sim.trace)
+    if scenario.get("plot"):
+        sim.plot_result(scenario["plot"])
+    cwnd = sim.trace.cwnd_values()
+    phases = sim.trace.phase_codes()
+    return {
+        "algorithm": scenario.get("algorithm", "reno"),
+        "rtts": sim.max_rtt,
+        "throughput": sim.throughput(),
+        "mean_cwnd": float(cwnd.mean()) if len(cwnd) else 0.0,
+        "loss_count": int(sum((phases == code).sum() for code in sim.LOSS_PHASES)),
+    }
+
+
+def run_rdt(scenario, instruments=None):
+    """
+    Send scenario["messages"] (a count of generated messages or a list of
+    strings), or the file named by scenario["input"], over one of the RDT
+    protocols and report what happened, counted by event type. Events go to
+    a JSONL file with scenario["events"], or to the console with
+    scenario["verbose"]. With instruments, every event is also counted and
+    the retransmissions of each segment go into a histogram.
+    """
+    import events
+    from script_loader import load_script
+
+    protocol = scenario.get("protocol", "rdt30")
+    if protocol not in RDT_PROTOCOLS:
+        raise ValueError(f"Unknown RDT protocol: {protocol}")
+    rng = random.Random(scenario.get("seed", 0))
+    scheduler = None
+    if protocol != "rdt22":
+        rdt = load_script('rdt30')
+        scheduler = rdt.EventScheduler()
+    if scenario.get("verbose"):
+        sink = events.ConsoleSink(lambda: scheduler.now) if scheduler is not None else events.ConsoleSink()
+    elif scenario.get("events"):
+        sink = events.JsonlSink(scenario["events"], (lambda: scheduler.now) if scheduler is not None else None)
+    else:
+        sink = events.CountingSink()
+    counter = sink
+    if instruments is not None:
+        from instrumentation import InstrumentedSink
+        sink = InstrumentedSink(instruments, sink)
+    error_rate = scenario.get("error_rate", 0.2)
+    ack_error_rate = scenario.get("ack_error_rate", 0.3)
+
+    if protocol == "rdt22":
+        rdt = load_script('rdt22')
+        channel = rdt.NetworkChannel(error_rate, ack_error_rate, rng=rng)
+        sender, receiver = rdt.TransmitterNode(sink=sink), rdt.ReceiverNode(sink=sink)
+    else:
+        channel = rdt.NetworkChannel(error_rate, scenario.get("loss_rate", 0.1), scenario.get("propagation_delay", 0.1),
+                                     ack_error_rate, rng=rng)
+        timeout = scenario.get("timeout", 2.0)
+        if protocol == "rdt30":
+            sender, receiver = rdt.Sender(scheduler, timeout, sink), rdt.Receiver(sink=sink)
+        else:
+            window_size = scenario.get("window_size", 4)
+            if protocol == "gbn":
+                sender = rdt.GoBackNSender(window_size, timeout=timeout, scheduler=scheduler, sink=sink)
+                receiver = rdt.GoBackNReceiver(sink=sink)
+            else:
+                sender = rdt.SelectiveRepeatSender(window_size, timeout=timeout, scheduler=scheduler, sink=sink)
+                receiver = rdt.SelectiveRepeatReceiver(window_size, sink=sink)
+
+    if scenario.get("input"):
+        from rdt_stream import stream_transfer
+        with open(scenario.get("output") or os.devnull, 'wb') as output:
+            result = stream_transfer(scenario["input"], output, sender, receiver, channel, scenario.get("mss", 1024))
+    else:
+        messages = scenario.get("messages", 100)
+        if isinstance(messages, int):
+            messages = [f"message {i}" for i in range(messages)]
+        delivered = []
+        receiver.on_deliver = delivered.append
+        if hasattr(sender, 'transmit_all'):
+            sender.transmit_all(messages, receiver, channel)
+        else:
+            for message in messages:
+                sender.transmit(message, receiver, channel)
+        result = {"messages": len(messages), "delivered": len(delivered)}
+
+    if scheduler is not None:
+        result["simulated_time"] = scheduler.now
+    if isinstance(counter, events.CountingSink):
+        result.update((name, total) for name, total in counter.counts().items() if total)
+    sink.close()
+    return dict(result, protocol=protocol)
+
+
+def run_packet(scenario, instruments=None):
+    from tcp_packet import PacketReno
+    sim = PacketReno(scenario.get("bandwidth", 1000.0), scenario.get("rtt", 0.1), scenario.get("buffer", 50),
+                     scenario.get("loss_rate", 0.0), scenario.get("ssthresh", 64), scenario.get("segments", 100000),
+                     seed=scenario.get("seed", 0))
+    result = sim.run()
+    if instruments is not None:
+        instruments.record_phases(sim.trace)
+    if scenario.get("plot"):
+        sim.plot_result(scenario["plot"])
+    return result
+
+
+RUNNERS = {"tcp": run_tcp, "rdt": run_rdt, "packet": run_packet}
+
+
+def run_scenario(scenario, instruments=None):
+    """
+    Run one scenario and return its parameters merged with its results and
+    wall time. instruments (an instrumentation.Instrumentation) collects
+    its phase and retransmission histograms.
+    """
+    kind = scenario.get("kind", "tcp")
+    if kind not in RUNNERS:
+        raise ValueError(f"Unknown scenario kind: {kind} (expected one of {', '.join(SCENARIO_KINDS)})")
+    started = time.perf_counter()
+    result = RUNNERS[kind](scenario, instruments)
+    return dict(scenario, kind=kind, **result, wall_time=time.perf_counter() - started)
+
+
+def run_batch(scenarios, workers=1, instruments=None):
+    """
+    Yield the result of every scenario in order, running them on `workers`
+    processes. Instrumented batches run in this process, where the
+    instruments are.
+    """
+    if workers <= 1 or len(scenarios) <= 1 or instruments is not None:
+        for scenario in scenarios:
+            yield run_scenario(scenario, instruments)
+        return
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(run_scenario, scenarios)
+
+
+def write_results(results, output):
+    """Write results to a file object as JSON lines, one scenario per line."""
+    for result in results:
+        output.write(json.dumps(result) + "\n")
+        output.flush()
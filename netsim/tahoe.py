@@ -0,0 +1,7 @@
+# TCP_TAHOE.py UNDER THE PACKAGE: THIS MODULE IS THE SAME OBJECT AS TCP_TAHOE
+
+import sys
+
+import TCP_TAHOE
+
+sys.modules[__name__] = TCP_TAHOE
@@ -0,0 +1,262 @@
+# RDT 3.0 OVER REAL UDP SOCKETS WITH AN ASYNCIO EVENT LOOP
+
+import argparse
+import asyncio
+import os
+import signal
+import statistics
+import time
+
+from events import NullSink
+from script_loader import load_script
+
+rdt = load_script('rdt30')
+
+
+def encode_acknowledgment(ack):
+    """ACKs travel as checksummed segments with an empty payload."""
+    return bytes(rdt.DataSegment(ack, b"").serialize())
+
+
+def decode_acknowledgment(data):
+    """Return the ACK number of a datagram, or None if it was corrupted on the way."""
+    segment = rdt.DataSegment.deserialize(data)
+    if segment is None or rdt.calculate_integrity_check(segment.sequence_number, segment.payload) != segment.checksum:
+        return None
+    return segment.sequence_number
+
+
+class DatagramTransport:
+    """Adapts an asyncio datagram endpoint to the transport interface the RDT 3.0 Sender expects."""
+
+    def __init__(self, loop, peer):
+        self.loop = loop
+        self.peer = peer
+        self.transport = None
+        self.datagrams_sent = 0
+
+    def time(self):
+        return self.loop.time()
+
+    def call_later(self, delay, callback, *args):
+        return self.loop.call_later(delay, callback, *args)
+
+    def send(self, segment_bytes):
+        self.transport.sendto(segment_bytes, self.peer)
+        self.datagrams_sent += 1
+        return True
+
+
+class SenderProtocol(asyncio.DatagramProtocol):
+    """Feeds ACK datagrams to a Sender."""
+
+    def __init__(self, sender, datagram_transport):
+        self.sender = sender
+        self.datagram_transport = datagram_transport
+
+    def connection_made(self, transport):
+        self.datagram_transport.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.sender.acknowledgment_arrived(decode_acknowledgment(data))
+
+
+class ReceiverProtocol(asyncio.DatagramProtocol):
+    """Runs a Receiver on a UDP socket, answering every segment with an ACK datagram."""
+
+    def __init__(self, receiver):
+        self.receiver = receiver
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        acknowledgment = self.receiver.process_segment(data)
+        self.transport.sendto(encode_acknowledgment(acknowledgment), addr)
+
+
+class LossyProxy(asyncio.DatagramProtocol):
+    """
+    Relays datagrams between one sender and one receiver, passing each of
+    them through a NetworkChannel so it may be dropped, have a bit flipped,
+    or be held back for the channel's propagation delay. ACKs coming back
+    from the receiver use the channel's reverse-path models.
+    """
+
+    def __init__(self, channel, receiver_address):
+        self.channel = channel
+        self.receiver_address = receiver_address
+        self.sender_address = None
+        self.transport = None
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        if addr == self.receiver_address:
+            destination = self.sender_address
+            impaired = self.channel.transmit_acknowledgment_segment(bytearray(data))
+            loss_model = self.channel.ack_loss_model
+        else:
+            self.sender_address = addr
+            destination = self.receiver_address
+            impaired = self.channel.transmit(bytearray(data))
+            loss_model = self.channel.loss_model
+        if impaired is not None and destination is not None:
+            asyncio.get_running_loop().call_later(
+                loss_model.delay(self.channel.propagation_delay), self.transport.sendto, bytes(impaired), destination)
+
+
+async def start_receiver(host='127.0.0.1', port=0, on_deliver=None, sink=None):
+    """Open a receiver endpoint; returns (transport, bound address)."""
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(
+        lambda: ReceiverProtocol(rdt.Receiver(on_deliver, sink)), local_addr=(host, port))
+    return transport, transport.get_extra_info('sockname')
+
+
+async def start_proxy(channel, receiver_address, host='127.0.0.1', port=0):
+    """Open a lossy proxy in front of receiver_address; returns (transport, bound address)."""
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(
+        lambda: LossyProxy(channel, receiver_address), local_addr=(host, port))
+    return transport, transport.get_extra_info('sockname')
+
+
+async def send_all(payloads, peer, timeout=0.05, sink=None):
+    """
+    Send every payload to peer with a stop-and-wait RDT 3.0 sender on a real
+    socket and real timers. Returns (per-message latencies, datagrams sent).
+    """
+    loop = asyncio.get_running_loop()
+    sender = rdt.Sender(timeout=timeout, sink=sink)
+    datagram_transport = DatagramTransport(loop, peer)
+    transport, _ = await loop.create_datagram_endpoint(
+        lambda: SenderProtocol(sender, datagram_transport), remote_addr=peer)
+    latencies = []
+    try:
+        for payload in payloads:
+            acknowledged = loop.create_future()
+            started = loop.time()
+            sender.start(payload, datagram_transport, lambda: acknowledged.set_result(None))
+            await acknowledged
+            latencies.append(loop.time() - started)
+    finally:
+        transport.close()
+    return latencies, datagram_transport.datagrams_sent
+
+
+async def run_transfer(payloads, channel, timeout=0.05, sink=None):
+    """Run receiver, proxy and sender for one transfer on the current event loop."""
+    delivered = []
+    receiver_transport, receiver_address = await start_receiver(
+        on_deliver=lambda payload: delivered.append(bytes(payload)), sink=sink)
+    proxy_transport, proxy_address = await start_proxy(channel, receiver_address)
+    try:
+        latencies, datagrams = await send_all(payloads, proxy_address, timeout, sink)
+    finally:
+        proxy_transport.close()
+        receiver_transport.close()
+    return latencies, datagrams, delivered
+
+
+async def run_demo(transfers, messages, size, channel_factory, timeout):
+    """Run many concurrent transfers on one event loop and report packet rate and latency."""
+    payloads = [os.urandom(size) for _ in range(messages)]
+    started = time.perf_counter()
+    results = await asyncio.gather(*(run_transfer(payloads, channel_factory(), timeout, NullSink())
+                                     for _ in range(transfers)))
+    elapsed = time.perf_counter() - started
+
+    latencies = [latency for result in results for latency in result[0]]
+    datagrams = sum(result[1] for result in results)
+    intact = all(result[2] == payloads for result in results)
+    return {
+        'transfers': transfers,
+        'messages': transfers * messages,
+        'elapsed': elapsed,
+        'packets_per_second': datagrams / elapsed,
+        'mean_latency_ms': statistics.mean(latencies) * 1000,
+        'p99_latency_ms': sorted(latencies)[int(0.99 * (len(latencies) - 1))] * 1000,
+        'intact': intact,
+    }
+
+
+async def serve_forever(*endpoints):
+    """Keep the endpoints open until SIGINT or SIGTERM."""
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(signum, stop.set)
+    try:
+        await stop.wait()
+    finally:
+        for transport in endpoints:
+            transport.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run RDT 3.0 over UDP on localhost")
+    parser.add_argument("--error-rate", type=float, default=0.2)
+    parser.add_argument("--loss-rate", type=float, default=0.1)
+    parser.add_argument("--delay", type=float, default=0.001, help="one-way proxy delay in seconds")
+    parser.add_argument("--timeout", type=float, default=0.05, help="retransmission timeout in seconds")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    receiver_command = commands.add_parser("receiver", help="run a receiver process")
+    receiver_command.add_argument("--port", type=int, default=9000)
+    receiver_command.add_argument("--output", help="file to write delivered payloads to")
+
+    proxy_command = commands.add_parser("proxy", help="run a lossy proxy process in front of a receiver")
+    proxy_command.add_argument("--port", type=int, default=9001)
+    proxy_command.add_argument("--receiver-port", type=int, default=9000)
+
+    sender_command = commands.add_parser("sender", help="run a sender process")
+    sender_command.add_argument("--port", type=int, default=9001, help="port of the proxy (or receiver)")
+    sender_command.add_argument("--input", help="file to send; random messages are sent otherwise")
+    sender_command.add_argument("--messages", type=int, default=1000)
+    sender_command.add_argument("--size", type=int, default=1024)
+
+    demo_command = commands.add_parser("demo", help="run many concurrent transfers in one event loop")
+    demo_command.add_argument("--transfers", type=int, default=16)
+    demo_command.add_argument("--messages", type=int, default=500)
+    demo_command.add_argument("--size", type=int, default=1024)
+    args = parser.parse_args(argv)
+
+    channel_factory = lambda: rdt.NetworkChannel(args.error_rate, args.loss_rate, args.delay)
+
+    if args.command == "receiver":
+        async def receive():
+            output = open(args.output, 'wb') if args.output else None
+            try:
+                transport, _ = await start_receiver(port=args.port, on_deliver=output.write if output else None,
+                                                    sink=NullSink())
+                await serve_forever(transport)
+            finally:
+                if output:
+                    output.close()
+        asyncio.run(receive())
+
+    elif args.command == "proxy":
+        async def relay():
+            transport, _ = await start_proxy(channel_factory(), ('127.0.0.1', args.receiver_port), port=args.port)
+            await serve_forever(transport)
+        asyncio.run(relay())
+
+    elif args.command == "sender":
+        from rdt_stream import iter_chunks
+        payloads = iter_chunks(args.input, args.size) if args.input else (os.urandom(args.size) for _ in range(args.messages))
+        started = time.perf_counter()
+        latencies, datagrams = asyncio.run(send_all(payloads, ('127.0.0.1', args.port), args.timeout, NullSink()))
+        elapsed = time.perf_counter() - started
+        print(f"Sent {len(latencies)} messages in {datagrams} datagrams over {elapsed:.3f} s "
+              f"({datagrams / elapsed:.0f} packets/s, mean latency {statistics.mean(latencies) * 1000:.3f} ms)")
+
+    else:
+        report = asyncio.run(run_demo(args.transfers, args.messages, args.size, channel_factory, args.timeout))
+        for name, value in report.items():
+            print(f"{name}: {value}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+# LOADER FOR THE PROTOCOL SCRIPTS WHOSE FILE NAMES ARE NOT VALID MODULE NAMES
+
+import importlib.util
+import os
+import sys
+
+_SCRIPTS = {
+    'rdt22': 'RDT2.2.py',
+    'rdt30': 'RDT3.0.py',
+}
+
+
+def load_script(module_name):
+    """
+    Import RDT2.2.py / RDT3.0.py as the module 'rdt22' / 'rdt30'. The module
+    is registered in sys.modules, so every caller shares the same classes.
+    """
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), _SCRIPTS[module_name])
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[module_name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def is_script(module_name):
+    """Whether module_name is one of the names load_script() imports a script under."""
+    return module_name in _SCRIPTS
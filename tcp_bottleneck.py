@@ -0,0 +1,181 @@
+# MANY TCP TAHOE AND RENO FLOWS SHARING ONE BOTTLENECK LINK
+
+import argparse
+import numpy as np
+
+from tcp_montecarlo import tahoe_step, reno_step
+
+
+def jain_fairness(throughputs):
+    """Jain's fairness index: 1 when every flow gets the same share, 1/n when one flow gets everything."""
+    throughputs = np.asarray(throughputs, dtype=float)
+    squares = np.dot(throughputs, throughputs)
+    if squares == 0:
+        return 1.0
+    return float(throughputs.sum() ** 2 / (len(throughputs) * squares))
+
+
+class DropTailQueue:
+    """A FIFO buffer that only drops what does not fit."""
+
+    def __init__(self, buffer_size):
+        self.buffer_size = buffer_size
+
+    def early_drop_probability(self, backlog):
+        return 0.0
+
+
+class REDQueue:
+    """
+    Random Early Detection (Floyd and Jacobson, 1993): arrivals are dropped
+    with a probability that grows linearly from 0 to max_probability as the
+    moving average of the queue length (updated once per RTT with the given
+    weight) goes from min_threshold to
+    max_threshold, and always above max_threshold.
+    """
+
+    def __init__(self, buffer_size, min_threshold=None, max_threshold=None, max_probability=0.1, weight=0.2):
+        self.buffer_size = buffer_size
+        self.min_threshold = min_threshold if min_threshold is not None else buffer_size / 4
+        self.max_threshold = max_threshold if max_threshold is not None else 3 * buffer_size / 4
+        self.max_probability = max_probability
+        self.weight = weight
+        self.average = 0.0
+
+    def early_drop_probability(self, backlog):
+        self.average += self.weight * (backlog - self.average)
+        if self.average < self.min_threshold:
+            return 0.0
+        if self.average >= self.max_threshold:
+            return 1.0
+        return self.max_probability * (self.average - self.min_threshold) / (self.max_threshold - self.min_threshold)
+
+
+class BottleneckLink:
+    """
+    A link serving capacity segments per RTT behind a queue. Every flow's
+    window arrives once per RTT and the arrivals are mixed uniformly, so each
+    segment of every flow sees the same drop probability.
+    """
+
+    def __init__(self, capacity, queue):
+        self.capacity = capacity
+        self.queue = queue
+        self.backlog = 0.0
+
+    def carry(self, cwnd, mss, rng):
+        """Offer one window per flow; returns (segments dropped per flow, segments delivered per flow)."""
+        segments = np.floor(cwnd / mss).astype(np.int64)
+        offered = segments.sum()
+        early = self.queue.early_drop_probability(self.backlog)
+        admitted = offered * (1 - early)
+        overflow = max(0.0, self.backlog + admitted - self.capacity - self.queue.buffer_size)
+        tail = overflow / admitted if admitted > 0 else 0.0
+        drops = rng.binomial(segments, 1 - (1 - early) * (1 - tail))
+
+        queued = self.backlog + admitted - overflow
+        served = min(self.capacity, queued)
+        self.backlog = queued - served
+        surviving = segments - drops
+        total = surviving.sum()
+        delivered = surviving * (served / total) if total > 0 else np.zeros(len(segments))
+        return drops, delivered
+
+
+class BottleneckResult:
+    """Per-flow throughput and per-RTT queue occupancy of a shared-bottleneck run."""
+
+    def __init__(self, algorithms, delivered, losses, queue_history, delivered_history, capacity):
+        self.algorithms = algorithms
+        self.delivered = delivered
+        self.losses = losses
+        self.queue_history = queue_history
+        self.delivered_history = delivered_history
+        self.capacity = capacity
+
+    def summary(self):
+        max_rtt = len(self.queue_history)
+        result = {
+            'flows': len(self.delivered),
+            'aggregate_throughput': float(self.delivered_history.mean()),
+            'utilization': float(self.delivered_history.mean() / self.capacity),
+            'jain_fairness': jain_fairness(self.delivered),
+            'mean_queue': float(self.queue_history.mean()),
+            'p95_queue': float(np.percentile(self.queue_history, 95)),
+            'max_queue': float(self.queue_history.max()),
+            'mean_losses_per_flow': float(self.losses.mean()),
+        }
+        for name in ("tahoe", "reno"):
+            flows = self.algorithms == name
+            if flows.any():
+                result[f'{name}_throughput_per_flow'] = float(self.delivered[flows].mean() / max_rtt)
+                result[f'{name}_jain_fairness'] = jain_fairness(self.delivered[flows])
+        return result
+
+
+def simulate_bottleneck(tahoe_flows, reno_flows, capacity, buffer_size, max_rtt, queue="droptail",
+                        mss=1, initial_ssthresh=8, seed=0, **red_options):
+    """
+    Run tahoe_flows + reno_flows flows through one bottleneck for max_rtt
+    RTTs. Losses come only from the queue; a Reno flow left with fewer than
+    three segments after a loss cannot collect three duplicate ACKs and
+    times out instead of entering fast recovery.
+    """
+    if queue == "droptail":
+        link = BottleneckLink(capacity, DropTailQueue(buffer_size))
+    elif queue == "red":
+        link = BottleneckLink(capacity, REDQueue(buffer_size, **red_options))
+    else:
+        raise ValueError(f"Unknown queue discipline: {queue}")
+    rng = np.random.default_rng(seed)
+    flows = tahoe_flows + reno_flows
+
+    # Tahoe flows come first, so each algorithm updates a contiguous view in place.
+    cwnd = np.full(flows, float(mss))
+    ssthresh = np.full(flows, float(initial_ssthresh))
+    in_fast_recovery = np.zeros(reno_flows, dtype=bool)
+    tahoe, reno = slice(0, tahoe_flows), slice(tahoe_flows, flows)
+
+    delivered = np.zeros(flows)
+    losses = np.zeros(flows, dtype=np.int64)
+    queue_history = np.empty(max_rtt)
+    delivered_history = np.empty(max_rtt)
+
+    for rtt_count in range(max_rtt):
+        drops, delivered_now = link.carry(cwnd, mss, rng)
+        loss = drops > 0
+        delivered += delivered_now
+        losses += loss
+        queue_history[rtt_count] = link.backlog
+        delivered_history[rtt_count] = delivered_now.sum()
+
+        if tahoe_flows:
+            tahoe_step(cwnd[tahoe], ssthresh[tahoe], loss[tahoe], mss)
+        if reno_flows:
+            timeout = loss[reno] & ((cwnd[reno] / mss - drops[reno]) < 3)
+            reno_step(cwnd[reno], ssthresh[reno], in_fast_recovery, loss[reno], timeout, mss)
+
+    algorithms = np.array(["tahoe"] * tahoe_flows + ["reno"] * reno_flows)
+    return BottleneckResult(algorithms, delivered, losses, queue_history, delivered_history, capacity)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate many TCP flows sharing one bottleneck link")
+    parser.add_argument("--tahoe-flows", type=int, default=5000)
+    parser.add_argument("--reno-flows", type=int, default=5000)
+    parser.add_argument("--capacity", type=float, default=100000, help="segments per RTT")
+    parser.add_argument("--buffer", type=float, default=50000, help="queue size in segments")
+    parser.add_argument("--queue", choices=("droptail", "red"), default="droptail")
+    parser.add_argument("--mss", type=int, default=1)
+    parser.add_argument("--ssthresh", type=int, default=8)
+    parser.add_argument("--max-rtt", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    result = simulate_bottleneck(args.tahoe_flows, args.reno_flows, args.capacity, args.buffer, args.max_rtt,
+                                 args.queue, args.mss, args.ssthresh, args.seed)
+    for name, value in result.summary().items():
+        print(f"{name}: {value}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+# MEMOIZED SUMMARIES OF PER-RTT TCP RUNS, CHECKED AGAINST THE MATHIS MODEL
+
+import argparse
+import collections
+import hashlib
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+
+import congestion
+from tcp_simulation import TCPSimulation, LinkProfile
+from tcp_trace import TraceRecorder
+
+# Everything a summary depends on, with the value a query gets when it leaves a field out.
+QUERY_DEFAULTS = {
+    "algorithm": "reno",
+    "mss": 1,
+    "ssthresh": 8,
+    "loss_interval": 15,
+    "max_rtt": 50,
+    "seed": 0,
+    "loss_probability": 0.0,
+    "loss_kind": None,
+}
+LOSS_KINDS = ("timeout", "triple_duplicate_ack")
+
+
+def normalize(query):
+    """The full query: every field of QUERY_DEFAULTS, defaults filled in."""
+    unknown = set(query) - set(QUERY_DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown query fields: {', '.join(sorted(unknown))}")
+    query = dict(QUERY_DEFAULTS, **query)
+    if query["algorithm"] not in congestion.CONTROLLERS:
+        raise ValueError(f"Unknown congestion control algorithm: {query['algorithm']}")
+    if query["loss_kind"] not in LOSS_KINDS + (None,):
+        raise ValueError(f"Unknown loss kind: {query['loss_kind']}")
+    return query
+
+
+def mathis_throughput(mss, rtt, loss_rate):
+    """
+    The Mathis et al. steady-state throughput, MSS / RTT * sqrt(3 / (2p)),
+    for a loss rate p per segment; None without losses.
+    """
+    if loss_rate <= 0:
+        return None
+    return mss / rtt * math.sqrt(1.5 / loss_rate)
+
+
+def summarize(sim):
+    """
+    Summary statistics of a finished run, taken from the simulation's
+    running totals rather than its trace, so they cover every RTT even when
+    the trace is a ring or the run was extrapolated.
+    """
+    rtts = sim.rtt_count
+    loss_count = sum(sim.phase_rtts[code] for code in sim.LOSS_PHASES)
+    segments = sim.delivered / sim.mss
+    loss_rate = loss_count / segments if segments else 0.0
+    throughput = sim.throughput()
+    mathis = mathis_throughput(sim.mss, sim.rtt, loss_rate)
+    return {
+        "throughput": throughput,
+        "mean_cwnd": sim.cwnd_sum / rtts if rtts else 0.0,
+        "loss_count": loss_count,
+        "loss_rate": loss_rate,
+        "time_in_phase": {name: count * sim.rtt for name, count in zip(sim.PHASES, sim.phase_rtts)},
+        "mathis_throughput": mathis,
+        "mathis_ratio": throughput / mathis if mathis else None,
+        "cycle": sim.cycle,
+    }
+
+
+def simulate(query):
+    """Run the simulation a normalized query describes and summarize it."""
+    controller = congestion.create(query["algorithm"], query["mss"], query["ssthresh"])
+    link = LinkProfile(loss_probability=query["loss_probability"], loss_interval=query["loss_interval"],
+                       loss_kind=query["loss_kind"])
+    sim = TCPSimulation(controller, query["max_rtt"], link, TraceRecorder(1, controller.PHASES, "ring"),
+                        random.Random(query["seed"]))
+    sim.run()
+    return summarize(sim)
+
+
+class ResultCache:
+    """
+    Summaries of TCP runs keyed by their query: the maxsize most recently
+    used in memory, and, with a directory, every one ever computed on disk
+    as one JSON file per query. get() answers from memory, then disk, and
+    only then runs the simulation.
+    """
+
+    def __init__(self, directory=None, maxsize=128):
+        self.directory = directory
+        self.maxsize = maxsize
+        self.memory = collections.OrderedDict()
+        self.hits = self.disk_hits = self.misses = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(query):
+        return json.dumps([query[name] for name in QUERY_DEFAULTS])
+
+    def _path(self, key):
+        return os.path.join(self.directory, hashlib.sha256(key.encode('utf-8')).hexdigest() + ".json")
+
+    def _load(self, key):
+        try:
+            with open(self._path(key)) as entry_file:
+                entry = json.load(entry_file)
+        except (OSError, ValueError):
+            return None
+        return entry["result"] if entry.get("key") == key else None
+
+    def _store(self, key, result):
+        """Write the entry to a temporary file and rename it into place, so readers never see half of it."""
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, prefix=".entry-")
+        try:
+            with os.fdopen(descriptor, 'w') as entry_file:
+                json.dump({"key": key, "result": result}, entry_file)
+            os.replace(temporary, self._path(key))
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    def _remember(self, key, result):
+        self.memory[key] = result
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.maxsize:
+            self.memory.popitem(last=False)
+
+    def get(self, **query):
+        """The summary of the run a query (fields of QUERY_DEFAULTS) describes."""
+        query = normalize(query)
+        key = self.key(query)
+        result = self.memory.get(key)
+        if result is not None:
+            self.hits += 1
+            self.memory.move_to_end(key)
+        else:
+            result = self._load(key) if self.directory is not None else None
+            if result is not None:
+                self.disk_hits += 1
+            else:
+                self.misses += 1
+                result = simulate(query)
+                if self.directory is not None:
+                    self._store(key, result)
+            self._remember(key, result)
+        # A fresh copy every time: callers may change the nested dicts without touching the cached entry.
+        return json.loads(json.dumps(dict(query, **result)))
+
+    def clear(self):
+        """Forget the entries in memory; the ones on disk stay."""
+        self.memory.clear()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize a per-RTT TCP run, answering from a cache when possible")
+    parser.add_argument("--algorithm", choices=sorted(congestion.CONTROLLERS), default=QUERY_DEFAULTS["algorithm"])
+    parser.add_argument("--mss", type=int, default=QUERY_DEFAULTS["mss"])
+    parser.add_argument("--ssthresh", type=int, default=QUERY_DEFAULTS["ssthresh"])
+    parser.add_argument("--loss-interval", type=int, default=QUERY_DEFAULTS["loss_interval"])
+    parser.add_argument("--max-rtt", type=int, default=QUERY_DEFAULTS["max_rtt"])
+    parser.add_argument("--seed", type=int, default=QUERY_DEFAULTS["seed"])
+    parser.add_argument("--loss-probability", type=float, default=QUERY_DEFAULTS["loss_probability"])
+    parser.add_argument("--loss-kind", choices=LOSS_KINDS, help="make every loss this kind instead of drawing it")
+    parser.add_argument("--cache-dir", default=".tcp_cache", help="directory of the on-disk cache")
+    args = parser.parse_args(argv)
+
+    cache = ResultCache(args.cache_dir)
+    result = cache.get(algorithm=args.algorithm, mss=args.mss, ssthresh=args.ssthresh,
+                       loss_interval=args.loss_interval, max_rtt=args.max_rtt, seed=args.seed,
+                       loss_probability=args.loss_probability, loss_kind=args.loss_kind)
+    print(json.dumps(result))
+    print("from the cache" if cache.disk_hits else "simulated", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
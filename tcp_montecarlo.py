@@ -0,0 +1,200 @@
+# VECTORIZED MONTE CARLO ENGINE FOR THE TCP TAHOE AND RENO SIMULATIONS
+
+import argparse
+import random
+import numpy as np
+
+RANDOM_LOSS_PROBABILITY = 0.02
+
+TAHOE_PHASES = ("Slow start", "Congestion avoidance", "Loss event")
+RENO_PHASES = ("Slow Start", "Congestion Avoidance", "Fast Recovery", "Timeout")
+
+SLOW_START, CONGESTION_AVOIDANCE = 0, 1
+TAHOE_LOSS_EVENT = 2
+RENO_FAST_RECOVERY, RENO_TIMEOUT = 2, 3
+
+
+class RandomStreams:
+    """
+    One Mersenne Twister stream per run. Raw words are pulled from
+    random.Random(seed) in blocks and turned into exactly the values that
+    random.random() / random.choice() would have returned, so batched runs
+    reproduce the scalar simulations draw for draw. Each run buffers `block`
+    words (4 bytes each); the block size never changes the values drawn.
+    """
+
+    def __init__(self, seeds, block=1024):
+        self.generators = [random.Random(seed) for seed in seeds]
+        self.block = block
+        self.words = np.empty(len(seeds) * block, dtype=np.uint32)
+        self.position = np.arange(len(seeds)) * block + block
+        self.row_start = np.arange(len(seeds)) * block
+
+    def next_words(self, rows):
+        """Return the next raw 32-bit output of each listed run's generator."""
+        position = self.position[rows]
+        exhausted = position >= self.row_start[rows] + self.block
+        if exhausted.any():
+            for row in rows[exhausted]:
+                bits = self.generators[row].getrandbits(32 * self.block)
+                start = self.row_start[row]
+                self.words[start:start + self.block] = np.frombuffer(bits.to_bytes(4 * self.block, 'little'), dtype='<u4')
+                self.position[row] = start
+            position = self.position[rows]
+        self.position[rows] = position + 1
+        return self.words.take(position)
+
+    def random(self, rows):
+        """Vectorized random.random(): a 53-bit float built from two 32-bit words."""
+        high = self.next_words(rows) >> 5
+        low = self.next_words(rows) >> 6
+        return (high * 67108864.0 + low) * (1.0 / 9007199254740992.0)
+
+    def choice2(self, rows):
+        """Vectorized random.choice() over two items, including its rejection sampling."""
+        result = np.empty(len(rows), dtype=np.int64)
+        pending = np.arange(len(rows))
+        while pending.size:
+            bits = self.next_words(rows[pending]) >> 30
+            accepted = bits < 2
+            result[pending[accepted]] = bits[accepted]
+            pending = pending[~accepted]
+        return result
+
+
+def tahoe_step(cwnd, ssthresh, loss, mss):
+    """Advance every Tahoe run by one RTT and return the phase code of each run."""
+    slow_start = cwnd < ssthresh
+    phase = np.where(slow_start, SLOW_START, CONGESTION_AVOIDANCE).astype(np.uint8)
+    grown = np.where(slow_start, cwnd * 2, cwnd + mss)
+
+    ssthresh[loss] = cwnd[loss] / 2
+    phase[loss] = TAHOE_LOSS_EVENT
+    np.copyto(cwnd, np.maximum(np.where(loss, mss, grown), mss))
+    return phase
+
+
+def reno_step(cwnd, ssthresh, in_fast_recovery, loss, timeout, mss):
+    """Advance every Reno run by one RTT and return the phase code of each run."""
+    slow_start = (cwnd < ssthresh) & ~in_fast_recovery
+    phase = np.where(slow_start, SLOW_START, CONGESTION_AVOIDANCE).astype(np.uint8)
+
+    recovering = ~loss & in_fast_recovery
+    recovered = cwnd + mss
+    exits = recovering & (recovered >= ssthresh)
+    grown = np.where(recovering, recovered, np.where(cwnd < ssthresh, cwnd * 2, cwnd + mss))
+
+    halved = loss & ~timeout
+    timed_out = loss & timeout
+    ssthresh[loss] = np.maximum(cwnd[loss] / 2, 2 * mss)
+    grown[halved] = cwnd[halved] / 2
+    grown[timed_out] = mss
+    in_fast_recovery[halved] = True
+    in_fast_recovery[timed_out | exits] = False
+    phase[halved] = RENO_FAST_RECOVERY
+    phase[timed_out] = RENO_TIMEOUT
+    phase[exits] = CONGESTION_AVOIDANCE
+    np.copyto(cwnd, np.maximum(grown, mss))
+    return phase
+
+
+class MonteCarloResult:
+    """Per-run histories and summary statistics of a batch of TCP simulations."""
+
+    def __init__(self, algorithm, phase_names, cwnd, ssthresh, phase, cwnd_sum, loss_count):
+        self.algorithm = algorithm
+        self.phase_names = phase_names
+        self.cwnd = cwnd
+        self.ssthresh = ssthresh
+        self.phase = phase
+        self.cwnd_sum = cwnd_sum
+        self.loss_count = loss_count
+
+    def history(self, run):
+        """Return (cwnd_list, ssthresh_list, phase_list) for one run, as the scalar classes log them."""
+        if self.cwnd is None:
+            raise ValueError("Histories were not recorded for this batch")
+        return (self.cwnd[run].tolist(), self.ssthresh[run].tolist(),
+                [self.phase_names[code] for code in self.phase[run]])
+
+    def summary(self, max_rtt):
+        """Aggregate statistics over all runs."""
+        mean_cwnd = self.cwnd_sum / max_rtt
+        return {
+            'runs': len(mean_cwnd),
+            'mean_cwnd': float(mean_cwnd.mean()),
+            'std_cwnd': float(mean_cwnd.std()),
+            'p5_cwnd': float(np.percentile(mean_cwnd, 5)),
+            'p95_cwnd': float(np.percentile(mean_cwnd, 95)),
+            'mean_losses': float(self.loss_count.mean()),
+        }
+
+
+def simulate_batch(algorithm, mss, initial_ssthresh, max_rtt, loss_interval, seeds, record_history=True):
+    """
+    Run one TCP simulation per seed, all at once. Run i reproduces
+    random.seed(seeds[i]) followed by TCPTahoe/TCPReno(...).run().
+    """
+    if algorithm not in ("tahoe", "reno"):
+        raise ValueError(f"Unknown algorithm: {algorithm}")
+    runs = len(seeds)
+    rows = np.arange(runs)
+    # random() takes two words per RTT and Reno's choice2() two more on average.
+    words_per_rtt = 2 if algorithm == "tahoe" else 4
+    streams = RandomStreams(seeds, block=max(1, min(1024, words_per_rtt * max_rtt)))
+    cwnd = np.full(runs, float(mss))
+    ssthresh = np.full(runs, float(initial_ssthresh))
+    in_fast_recovery = np.zeros(runs, dtype=bool)
+    cwnd_sum = np.zeros(runs)
+    loss_count = np.zeros(runs, dtype=np.int64)
+
+    if record_history:
+        cwnd_history = np.empty((runs, max_rtt))
+        ssthresh_history = np.empty((runs, max_rtt))
+        phase_history = np.empty((runs, max_rtt), dtype=np.uint8)
+    else:
+        cwnd_history = ssthresh_history = phase_history = None
+
+    for rtt_count in range(max_rtt):
+        forced = rtt_count % loss_interval == 0 and rtt_count > 0
+        if algorithm == "tahoe":
+            loss = np.ones(runs, dtype=bool) if forced else streams.random(rows) < RANDOM_LOSS_PROBABILITY
+            phase = tahoe_step(cwnd, ssthresh, loss, mss)
+        else:
+            if forced:
+                loss = np.ones(runs, dtype=bool)
+            else:
+                loss = streams.random(rows) < RANDOM_LOSS_PROBABILITY
+            timeout = streams.choice2(rows) == 0
+            phase = reno_step(cwnd, ssthresh, in_fast_recovery, loss, timeout, mss)
+
+        cwnd_sum += cwnd
+        loss_count += loss
+        if record_history:
+            cwnd_history[:, rtt_count] = cwnd
+            ssthresh_history[:, rtt_count] = ssthresh
+            phase_history[:, rtt_count] = phase
+
+    phase_names = TAHOE_PHASES if algorithm == "tahoe" else RENO_PHASES
+    return MonteCarloResult(algorithm, phase_names, cwnd_history, ssthresh_history, phase_history, cwnd_sum, loss_count)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run many TCP Tahoe/Reno simulations at once")
+    parser.add_argument("--algorithm", choices=("tahoe", "reno"), default="reno")
+    parser.add_argument("--mss", type=int, default=1)
+    parser.add_argument("--ssthresh", type=int, default=8)
+    parser.add_argument("--max-rtt", type=int, default=50)
+    parser.add_argument("--loss-interval", type=int, default=15)
+    parser.add_argument("--runs", type=int, default=1000)
+    parser.add_argument("--first-seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    seeds = range(args.first_seed, args.first_seed + args.runs)
+    result = simulate_batch(args.algorithm, args.mss, args.ssthresh, args.max_rtt, args.loss_interval,
+                            seeds, record_history=False)
+    for name, value in result.summary(args.max_rtt).items():
+        print(f"{name}: {value}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,347 @@
+# PACKET-LEVEL TCP RENO: PER-SEGMENT, PER-ACK SIMULATION ON AN EVENT HEAP
+
+import argparse
+import collections
+import os
+import random
+
+import checkpoint
+from loss_models import BernoulliLoss, GilbertElliottLoss, TraceReplayLoss
+from script_loader import load_script
+from tcp_montecarlo import RENO_PHASES, SLOW_START, CONGESTION_AVOIDANCE, RENO_FAST_RECOVERY, RENO_TIMEOUT
+from tcp_trace import TraceRecorder, StreamingTraceRecorder
+
+EventScheduler = load_script('rdt30').EventScheduler
+
+DUPLICATE_ACK_THRESHOLD = 3
+
+
+class RetransmissionTimer:
+    """
+    RFC 6298 RTO estimation: SRTT and RTTVAR from Karn-filtered samples,
+    RTO = SRTT + max(G, 4 * RTTVAR) clamped to [min_rto, max_rto], doubled
+    on every expiry until a fresh sample arrives.
+    """
+
+    ALPHA = 1 / 8
+    BETA = 1 / 4
+
+    def __init__(self, initial_rto=1.0, min_rto=1.0, max_rto=60.0, granularity=0.001):
+        self.srtt = None
+        self.rttvar = None
+        self.rto = initial_rto
+        self.min_rto = min_rto
+        self.max_rto = max_rto
+        self.granularity = granularity
+
+    def sample(self, rtt):
+        if self.srtt is None:
+            self.srtt = rtt
+            self.rttvar = rtt / 2
+        else:
+            self.rttvar = (1 - self.BETA) * self.rttvar + self.BETA * abs(self.srtt - rtt)
+            self.srtt = (1 - self.ALPHA) * self.srtt + self.ALPHA * rtt
+        self.rto = min(max(self.srtt + max(self.granularity, 4 * self.rttvar), self.min_rto), self.max_rto)
+
+    def back_off(self):
+        self.rto = min(self.rto * 2, self.max_rto)
+
+
+class PacketReno:
+    """
+    TCP Reno at segment granularity. Segments cross a bottleneck of
+    bandwidth segments per second with a DropTail buffer of buffer_size
+    segments, plus random loss from loss_model (by default independent
+    losses with probability loss_rate); ACKs
+    return uncongested. The receiver sends a cumulative ACK for every
+    segment, so losses are detected from three real duplicate ACKs (fast
+    retransmit and fast recovery with window inflation) or from the
+    retransmission timer.
+
+    cwnd and ssthresh are counted in segments, and a per-RTT sample of them
+    is recorded in the same TraceRecorder format that TCPReno.update_window
+    produces.
+    """
+
+    PHASES = RENO_PHASES
+
+    def __init__(self, bandwidth=1000.0, rtt=0.1, buffer_size=50, loss_rate=0.0, initial_ssthresh=64,
+                 segments=100000, min_rto=1.0, seed=0, trace=None, loss_model=None):
+        self.bandwidth = bandwidth
+        self.rtt = rtt
+        self.buffer_size = buffer_size
+        self.loss_rate = loss_rate
+        self.segments = segments
+        self.random = random.Random(seed)
+        self.loss_model = loss_model if loss_model is not None else BernoulliLoss(loss_rate, self.random)
+        self.scheduler = EventScheduler()
+        self.timer = RetransmissionTimer(min_rto=min_rto)
+        self.trace = trace if trace is not None else TraceRecorder(1024, self.PHASES)
+
+        self.cwnd = 1.0
+        self.ssthresh = float(initial_ssthresh)
+        self.snd_una = 0
+        self.snd_nxt = 0
+        self.highest_sent = 0
+        # Send time of every segment in [snd_una, snd_nxt), None once it has been retransmitted (Karn).
+        self.sent_at = collections.deque()
+        self.duplicate_acks = 0
+        self.in_fast_recovery = False
+        self.timer_deadline = None
+        self.timer_event = None
+
+        self.rcv_nxt = 0
+        self.out_of_order = set()
+        self.link_free_at = 0.0
+
+        self.segments_sent = 0
+        self.retransmissions = 0
+        self.fast_retransmits = 0
+        self.timeouts = 0
+        self.dropped = 0
+        self._phase_event = None
+        self.duration = None
+
+    def run(self, duration=None, checkpoint_every=None, checkpoint_path=None):
+        """
+        Transfer all segments (or stop after duration simulated seconds) and
+        return the statistics. With checkpoint_every, the whole simulation,
+        including the event queue and the pending RTO timer, is saved to
+        checkpoint_path every checkpoint_every simulated seconds;
+        load_checkpoint(checkpoint_path).resume() carries on from there.
+        """
+        self.duration = duration
+        self._send_available()
+        self.scheduler.call_later(self.rtt, self._sample_window)
+        return self.resume(checkpoint_every, checkpoint_path)
+
+    def resume(self, checkpoint_every=None, checkpoint_path=None):
+        """Continue the run until it is done and return the statistics."""
+        if self.duration is None:
+            until = lambda: self.snd_una >= self.segments
+        else:
+            until = lambda: self.snd_una >= self.segments or self.scheduler.now >= self.duration
+        self.scheduler.run(until, checkpoint_every, checkpoint_path, self)
+        return self.statistics()
+
+    def save_checkpoint(self, path):
+        """Snapshot the simulation to path (see checkpoint.py)."""
+        checkpoint.save(self, path)
+
+    @staticmethod
+    def load_checkpoint(path):
+        """Return the simulation saved at path; resume() continues it where it stopped."""
+        return checkpoint.load(path)
+
+    def statistics(self):
+        elapsed = self.scheduler.now
+        return {
+            'segments_acknowledged': self.snd_una,
+            'segments_sent': self.segments_sent,
+            'retransmissions': self.retransmissions,
+            'fast_retransmits': self.fast_retransmits,
+            'timeouts': self.timeouts,
+            'dropped': self.dropped,
+            'elapsed': elapsed,
+            'goodput': self.snd_una / elapsed if elapsed > 0 else 0.0,
+            'srtt': self.timer.srtt,
+            'rto': self.timer.rto,
+        }
+
+    # Sender
+
+    def _send_available(self):
+        """Send new segments while the window allows."""
+        limit = min(self.snd_una + int(self.cwnd), self.segments)
+        while self.snd_nxt < limit:
+            self.sent_at.append(self.scheduler.now if self.snd_nxt >= self.highest_sent else None)
+            self._transmit(self.snd_nxt)
+            self.snd_nxt += 1
+        self.highest_sent = max(self.highest_sent, self.snd_nxt)
+
+    def _transmit(self, sequence_number):
+        """Put one segment on the bottleneck, or drop it if the buffer is full or the random loss strikes."""
+        self.segments_sent += 1
+        if sequence_number < self.highest_sent:
+            self.retransmissions += 1
+        if self.timer_deadline is None:
+            self._restart_timer()
+
+        now = self.scheduler.now
+        backlog = (self.link_free_at - now) * self.bandwidth
+        # Every segment advances the loss model, dropped at the buffer or not, so its state stays per packet.
+        lost = self.loss_model.lost()
+        if backlog >= self.buffer_size or lost:
+            self.dropped += 1
+            return
+        self.link_free_at = max(now, self.link_free_at) + 1 / self.bandwidth
+        self.scheduler.call_later(self.link_free_at - now + self.rtt / 2, self._segment_arrived, sequence_number)
+
+    def _acknowledgment_arrived(self, ack):
+        if ack > self.snd_una:
+            self._new_acknowledgment(ack)
+        elif ack == self.snd_una and self.snd_una < self.snd_nxt:
+            self._duplicate_acknowledgment()
+        self._send_available()
+
+    def _new_acknowledgment(self, ack):
+        sent_at = self.sent_at[ack - 1 - self.snd_una] if ack <= self.snd_nxt else None
+        if sent_at is not None:
+            self.timer.sample(self.scheduler.now - sent_at)
+        for _ in range(min(ack, self.snd_nxt) - self.snd_una):
+            self.sent_at.popleft()
+        self.snd_una = ack
+        self.snd_nxt = max(self.snd_nxt, ack)
+        self.duplicate_acks = 0
+
+        if self.in_fast_recovery:
+            self.cwnd = self.ssthresh
+            self.in_fast_recovery = False
+        elif self.cwnd < self.ssthresh:
+            self.cwnd += 1
+        else:
+            self.cwnd += 1 / self.cwnd
+
+        if self.snd_una < self.snd_nxt:
+            self._restart_timer()
+        else:
+            self.timer_deadline = None
+
+    def _duplicate_acknowledgment(self):
+        self.duplicate_acks += 1
+        if self.in_fast_recovery:
+            self.cwnd += 1
+        elif self.duplicate_acks == DUPLICATE_ACK_THRESHOLD:
+            self.ssthresh = max((self.snd_nxt - self.snd_una) / 2, 2)
+            self.cwnd = self.ssthresh + DUPLICATE_ACK_THRESHOLD
+            self.in_fast_recovery = True
+            self.fast_retransmits += 1
+            self._phase_event = RENO_FAST_RECOVERY
+            self.sent_at[0] = None
+            self._transmit(self.snd_una)
+
+    def _restart_timer(self):
+        """
+        Move the RTO deadline. Only one timer event is ever pending: when it
+        fires early because the deadline moved, it simply re-arms itself.
+        """
+        self.timer_deadline = self.scheduler.now + self.timer.rto
+        if self.timer_event is not None and self.timer_event.time > self.timer_deadline:
+            self.timer_event.cancel()
+            self.timer_event = None
+        if self.timer_event is None:
+            self.timer_event = self.scheduler.call_later(self.timer.rto, self._timer_fired)
+
+    def _timer_fired(self):
+        self.timer_event = None
+        if self.timer_deadline is None:
+            return
+        if self.scheduler.now < self.timer_deadline:
+            self.timer_event = self.scheduler.call_later(self.timer_deadline - self.scheduler.now, self._timer_fired)
+            return
+
+        self.timeouts += 1
+        self._phase_event = RENO_TIMEOUT
+        self.ssthresh = max((self.snd_nxt - self.snd_una) / 2, 2)
+        self.cwnd = 1.0
+        self.in_fast_recovery = False
+        self.duplicate_acks = 0
+        self.timer.back_off()
+        # Go back to the first unacknowledged segment; everything after it is resent as the window reopens.
+        self.snd_nxt = self.snd_una
+        self.sent_at.clear()
+        self.timer_deadline = None
+        self._send_available()
+
+    # Receiver
+
+    def _segment_arrived(self, sequence_number):
+        if sequence_number == self.rcv_nxt:
+            self.rcv_nxt += 1
+            while self.rcv_nxt in self.out_of_order:
+                self.out_of_order.remove(self.rcv_nxt)
+                self.rcv_nxt += 1
+        elif sequence_number > self.rcv_nxt:
+            self.out_of_order.add(sequence_number)
+        self.scheduler.call_later(self.rtt / 2, self._acknowledgment_arrived, self.rcv_nxt)
+
+    # Trace
+
+    def _sample_window(self):
+        """Record cwnd, ssthresh and phase once per base RTT, like the per-RTT model."""
+        if self._phase_event is not None:
+            phase = self._phase_event
+        elif self.in_fast_recovery:
+            phase = RENO_FAST_RECOVERY
+        else:
+            phase = SLOW_START if self.cwnd < self.ssthresh else CONGESTION_AVOIDANCE
+        self._phase_event = None
+        self.trace.record(self.cwnd, self.ssthresh, phase)
+        if self.snd_una < self.segments:
+            self.scheduler.call_later(self.rtt, self._sample_window)
+
+    def plot_result(self, path=None, width=1000, height=600):
+        """Plot the sampled cwnd and ssthresh; saved to path when given, shown otherwise."""
+        from tcp_plot import plot_trace
+        return plot_trace(self.trace, 'Packet-level TCP Reno', (RENO_FAST_RECOVERY, RENO_TIMEOUT), path, width, height)
+
+    def print_log(self, max_entries=15):
+        """This function prints the logged values"""
+        print("RTT | cwnd | ssthresh | Phase")
+        print("-" * 40)
+        for rtt, cwnd, ssthresh, phase in self.trace.rows(max_entries):
+            print(f"{rtt:3d} | {cwnd:4.1f} | "
+                  f"{ssthresh:4.1f} | {phase}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Packet-level TCP Reno over a bottleneck link")
+    parser.add_argument("--bandwidth", type=float, default=1000.0, help="bottleneck rate in segments per second")
+    parser.add_argument("--rtt", type=float, default=0.1, help="base round-trip time in seconds")
+    parser.add_argument("--buffer", type=int, default=50, help="bottleneck buffer in segments")
+    parser.add_argument("--loss-rate", type=float, default=0.0, help="random per-segment loss probability")
+    parser.add_argument("--burst-length", type=float,
+                        help="mean number of consecutive losses; makes --loss-rate bursty (Gilbert-Elliott)")
+    parser.add_argument("--loss-trace", help="replay per-segment losses from a trace written by loss_models.write_trace")
+    parser.add_argument("--ssthresh", type=float, default=64)
+    parser.add_argument("--segments", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--log", type=int, default=15, help="number of per-RTT trace rows to print")
+    parser.add_argument("--trace-dir", help="stream the per-RTT trace to this directory instead of keeping it in memory")
+    parser.add_argument("--trace-format", choices=("npy", "parquet"), default="npy")
+    parser.add_argument("--plot", help="save a cwnd/ssthresh plot to this image file")
+    parser.add_argument("--checkpoint", help="checkpoint file; resumed from if it exists")
+    parser.add_argument("--checkpoint-every", type=float, default=60.0, help="simulated seconds between checkpoints")
+    args = parser.parse_args(argv)
+
+    if args.checkpoint and os.path.exists(args.checkpoint):
+        sim = PacketReno.load_checkpoint(args.checkpoint)
+        print(f"Resuming at t={sim.scheduler.now:.3f}s from {args.checkpoint}")
+        report(sim, sim.resume(args.checkpoint_every, args.checkpoint), args)
+        return
+
+    if args.loss_trace:
+        loss_model = TraceReplayLoss(args.loss_trace)
+    elif args.burst_length:
+        loss_model = GilbertElliottLoss.from_statistics(args.loss_rate, args.burst_length, random.Random(args.seed))
+    else:
+        loss_model = None
+    trace = StreamingTraceRecorder(args.trace_dir, PacketReno.PHASES, format=args.trace_format) if args.trace_dir else None
+    sim = PacketReno(args.bandwidth, args.rtt, args.buffer, args.loss_rate, args.ssthresh, args.segments,
+                     seed=args.seed, trace=trace, loss_model=loss_model)
+    if args.checkpoint:
+        report(sim, sim.run(checkpoint_every=args.checkpoint_every, checkpoint_path=args.checkpoint), args)
+    else:
+        report(sim, sim.run(), args)
+
+
+def report(sim, statistics, args):
+    for name, value in statistics.items():
+        print(f"{name}: {value}")
+    print()
+    sim.print_log(max_entries=args.log)
+    if args.plot:
+        sim.plot_result(args.plot)
+
+if __name__ == '__main__':
+    main()
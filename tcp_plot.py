@@ -0,0 +1,90 @@
+# FAST CWND/SSTHRESH PLOTS FOR TRACES OF ANY LENGTH
+
+import numpy as np
+
+LOSS_COLORS = ('green', 'orange')
+
+
+def decimate_minmax(x, y, bins):
+    """
+    Reduce a line to at most about 2 * bins points by keeping the minimum and
+    maximum of every bin of consecutive samples, in their original order.
+    Drawn one bin per pixel column, the result looks the same as the full
+    line.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    count = len(y)
+    if count <= 2 * bins:
+        return x, y
+    size = -(-count // bins)
+    padded = np.concatenate((y, np.repeat(y[-1:], size * bins - count))).reshape(bins, size)
+    offsets = np.arange(bins)[:, None] * size
+    keep = np.sort(np.stack((padded.argmin(axis=1), padded.argmax(axis=1)), axis=1) + offsets, axis=1).ravel()
+    keep = np.unique(np.concatenate(([0], np.minimum(keep, count - 1), [count - 1])))
+    return x[keep], y[keep]
+
+
+def pixel_positions(x, span, bins):
+    """Keep one x value per pixel column, so each column gets at most one marker."""
+    x = np.asarray(x)
+    if len(x) <= bins:
+        return x
+    start, stop = span
+    columns = ((x - start) * (bins / max(stop - start, 1))).astype(np.int64)
+    _, first = np.unique(columns, return_index=True)
+    return x[first]
+
+
+def plot_trace(trace, title, loss_phases=(), path=None, width=1000, height=600, dpi=100):
+    """
+    Plot cwnd and ssthresh from a TraceRecorder, with a dotted vertical line
+    at every RTT whose phase is in loss_phases. Lines are min/max decimated
+    to the pixel width and loss markers are drawn as one collection per
+    phase, so the cost depends on the image size rather than the trace
+    length. With a path the figure is rendered off screen with Agg and saved
+    there; otherwise it is shown with pyplot.
+    """
+    if path is not None:
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+        figure = Figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+        FigureCanvasAgg(figure)
+    else:
+        import matplotlib.pyplot as plt
+        figure = plt.figure(figsize=(width / dpi, height / dpi), dpi=dpi)
+    axes = figure.add_subplot()
+    pixels = max(int(axes.bbox.width), 1)
+
+    rtts = trace.rtts()
+    cwnd = trace.cwnd_values()
+    ssthresh = trace.ssthresh_values()
+    phases = trace.phase_codes()
+    marker = 'o' if len(rtts) <= pixels // 10 else None
+    axes.plot(*decimate_minmax(rtts, cwnd, pixels), label='Congestion window size (cwnd)', color='blue', marker=marker)
+    axes.plot(*decimate_minmax(rtts, ssthresh, pixels), label='Threshold (ssthresh)', color='red', linestyle='--')
+
+    if len(rtts):
+        span = (int(rtts[0]), int(rtts[-1]) + 1)
+        for code, color in zip(loss_phases[::-1], LOSS_COLORS):
+            positions = pixel_positions(rtts[phases == code], span, pixels)
+            if len(positions):
+                axes.vlines(positions, 0, 1, transform=axes.get_xaxis_transform(), color=color, linestyles=':',
+                            alpha=0.5, zorder=1, label=trace.phase_names[code])
+        values = np.concatenate((cwnd, ssthresh))
+        values = values[np.isfinite(values)]
+        top = float(values.max()) if len(values) else 1.0
+        axes.set_xlim(*span)
+        axes.set_ylim(0, top * 1.05 if top > 0 else 1.0)
+
+    axes.set_xlabel('Transmission time in RTT')
+    axes.set_ylabel('Congestion window (in segments)')
+    axes.set_title(title)
+    axes.grid(True)
+    axes.legend(loc='upper right')
+
+    if path is not None:
+        figure.savefig(path)
+    else:
+        plt.show()
+    return figure
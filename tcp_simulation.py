@@ -0,0 +1,359 @@
+# SHARED PER-RTT SIMULATION LOOP FOR ANY CONGESTION CONTROLLER
+
+import argparse
+import pickle
+import random
+import sys
+
+import checkpoint
+import congestion
+from loss_models import BernoulliLoss
+from tcp_trace import TraceRecorder
+
+# What a loss turns out to be when the controller tells them apart and the link does not fix it.
+LOSS_EFFECTS = ('timeout', 'triple_duplicate_ack')
+
+
+class LinkProfile:
+    """
+    The path a simulated flow runs over. Losses are forced every
+    loss_interval RTTs, happen at random according to loss_model (by
+    default independently with loss_probability per RTT), and, when the
+    link has a capacity (segments per RTT, in cwnd units), whenever cwnd
+    exceeds capacity plus the buffer. Windows above capacity queue in the
+    buffer and stretch the RTT. Without a loss_model, each simulation draws
+    its Bernoulli losses from its own rng. Each loss is a timeout or a
+    triple duplicate ACK at random, unless loss_kind fixes which.
+    """
+
+    def __init__(self, name="default", rtt=1, loss_probability=0.02, loss_interval=None, capacity=None, buffer=0,
+                 loss_model=None, loss_kind=None):
+        self.name = name
+        self.rtt = rtt
+        self.loss_probability = loss_probability
+        self.loss_interval = loss_interval
+        self.capacity = capacity
+        self.buffer = buffer
+        self.loss_model = loss_model
+        self.loss_kind = loss_kind
+
+
+LINK_PROFILES = {
+    profile.name: profile for profile in (
+        LinkProfile("assignment", loss_interval=15, capacity=50),
+        LinkProfile("bottleneck", loss_probability=0.0, capacity=50, buffer=25),
+        LinkProfile("long-fat", loss_probability=0.0001, capacity=500, buffer=100),
+        LinkProfile("wireless", loss_probability=0.01, capacity=30, buffer=10),
+    )
+}
+
+
+class TCPSimulation:
+    """
+    Runs a congestion controller over a link one RTT at a time and logs cwnd,
+    ssthresh and phase. All randomness comes from rng (a random.Random, or
+    the global random module by default), so a seeded rng reproduces a run.
+
+    When nothing random can happen (see is_deterministic), the run stops
+    stepping once the controller returns to a state it was in at an earlier
+    loss: the cycle in between is repeated into the trace and the totals
+    instead of being simulated again. extrapolate=False turns this off.
+    """
+
+    # RTTs to search for a cycle before giving up and simulating every RTT.
+    MAX_CYCLE_SEARCH = 100000
+
+    def __init__(self, controller, max_rtt, link=None, trace=None, rng=random, extrapolate=True):
+        self.controller = controller
+        self.max_rtt = max_rtt
+        self.link = link if link is not None else LinkProfile()
+        self.mss = controller.mss
+        self.rtt = self.link.rtt
+        self.loss_interval = self.link.loss_interval
+        self.trace = trace if trace is not None else TraceRecorder(max_rtt, controller.PHASES)
+        self.rng = rng
+        self.loss_model = self.link.loss_model if self.link.loss_model is not None else \
+            BernoulliLoss(self.link.loss_probability, rng)
+        self.extrapolate = extrapolate
+        self.rtt_count = 0
+        self.delivered = 0.0
+        self.elapsed = 0.0
+        self.cwnd_sum = 0.0
+        self.phase_rtts = [0] * len(controller.PHASES)
+        self.cycle = None
+
+    @property
+    def PHASES(self):
+        return self.controller.PHASES
+
+    @property
+    def LOSS_PHASES(self):
+        return self.controller.LOSS_PHASES
+
+    @property
+    def cwnd(self):
+        return self.controller.cwnd
+
+    @property
+    def ssthresh(self):
+        return self.controller.ssthresh
+
+    @property
+    def cwnd_list(self):
+        return self.trace.cwnd_values().tolist()
+
+    @property
+    def ssthresh_list(self):
+        return self.trace.ssthresh_values().tolist()
+
+    @property
+    def rtt_list(self):
+        return self.trace.rtts().tolist()
+
+    @property
+    def phase_list(self):
+        return self.trace.phases()
+
+    def update_window(self, rtt_count):
+        """
+        Updating the congestion window as per the rules of the protocol, for
+        RTT rtt_count alone. Returns the phase code of that RTT.
+        """
+        return self._simulate(rtt_count, rtt_count + 1)
+
+    def _simulate(self, start, stop):
+        """
+        Simulate RTTs start to stop - 1: deliver the window, decide whether a
+        loss (timeout or triple duplicate ACK) happens, update the window and
+        log it. The per-RTT lookups are hoisted out of the loop. Returns the
+        phase code of the last RTT.
+        """
+        controller = self.controller
+        on_ack, on_loss, on_timeout = controller.on_ack, controller.on_loss, controller.on_timeout
+        link = self.link
+        base_rtt, capacity, buffer, loss_interval = link.rtt, link.capacity, link.buffer, link.loss_interval
+        overflow = None if capacity is None else capacity + buffer
+        lost = self.loss_model.lost
+        # The kind of loss is drawn every RTT, lost or not, unless it is fixed.
+        choose = self.rng.choice if controller.distinguishes_timeouts and link.loss_kind is None else None
+        fixed_timeout = controller.distinguishes_timeouts and link.loss_kind == 'timeout'
+        record = self.trace.record
+        phase_rtts = self.phase_rtts
+        delivered_total, elapsed, cwnd_sum = self.delivered, self.elapsed, self.cwnd_sum
+        phase = None
+        for rtt_count in range(start, stop):
+            cwnd = controller.cwnd
+            if capacity is None:
+                delivered, rtt = cwnd, base_rtt
+            else:
+                queued = min(max(cwnd - capacity, 0), buffer)
+                delivered, rtt = min(cwnd, capacity), base_rtt * (1 + queued / capacity)
+            delivered_total += delivered
+            elapsed += rtt
+
+            if loss_interval and rtt_count % loss_interval == 0 and rtt_count > 0:
+                has_loss = True
+            else:
+                has_loss = lost()
+            if overflow is not None and cwnd > overflow:
+                has_loss = True
+            timeout = choose(LOSS_EFFECTS) == 'timeout' if choose is not None else fixed_timeout
+
+            if not has_loss:
+                phase = on_ack(delivered, rtt)
+            elif timeout:
+                phase = on_timeout()
+            else:
+                phase = on_loss()
+            cwnd = controller.cwnd
+            record(cwnd, controller.ssthresh, phase)
+            cwnd_sum += cwnd
+            phase_rtts[phase] += 1
+        self.delivered, self.elapsed, self.cwnd_sum = delivered_total, elapsed, cwnd_sum
+        return phase
+
+    def is_deterministic(self):
+        """
+        True when every RTT follows from the state before it: no random
+        losses, and no random choice between timeouts and triple duplicate
+        ACKs. Losses then come only from loss_interval and the capacity.
+        """
+        link = self.link
+        return (link.loss_model is None and link.loss_probability == 0
+                and (link.loss_kind is not None or not self.controller.distinguishes_timeouts))
+
+    def _state_key(self):
+        """Everything the next RTTs depend on: the controller's state and the position in the loss interval."""
+        position = self.rtt_count % self.link.loss_interval if self.link.loss_interval else 0
+        return position, pickle.dumps(vars(self.controller))
+
+    def _run_until_cycle(self):
+        """
+        Step RTT by RTT, keying the state after every loss. When a key comes
+        back, the RTTs since it first appeared form a cycle; whole repeats
+        of it are added to the trace and totals without being simulated.
+        """
+        seen = {}
+        history = []
+        while self.rtt_count < self.max_rtt and len(history) < self.MAX_CYCLE_SEARCH:
+            delivered, elapsed = self.delivered, self.elapsed
+            phase = self.update_window(self.rtt_count)
+            self.rtt_count += 1
+            history.append((self.controller.cwnd, self.controller.ssthresh, phase,
+                            self.delivered - delivered, self.elapsed - elapsed))
+            if phase not in self.controller.LOSS_PHASES:
+                continue
+            key = self._state_key()
+            start = seen.setdefault(key, len(history))
+            if start < len(history):
+                self._repeat_cycle(history[start:])
+                return
+
+    def _repeat_cycle(self, cycle):
+        """Account for every whole repeat of cycle that fits before max_rtt."""
+        period = len(cycle)
+        repeats = (self.max_rtt - self.rtt_count) // period
+        self.cycle = {'start': self.rtt_count - period, 'period': period}
+        if not repeats:
+            return
+        cwnd, ssthresh, phases, delivered, elapsed = zip(*cycle)
+        self.trace.record_cycle(cwnd, ssthresh, phases, repeats * period)
+        self.delivered += repeats * sum(delivered)
+        self.elapsed += repeats * sum(elapsed)
+        self.cwnd_sum += repeats * sum(cwnd)
+        for phase in phases:
+            self.phase_rtts[phase] += repeats
+        self.rtt_count += repeats * period
+
+    def run(self, checkpoint_every=None, checkpoint_path=None):
+        """
+        This function runs the simulation for max_rtt RTTs, continuing from the
+        current RTT if the simulation was restored from a checkpoint. With
+        checkpoint_every, the full state is saved to checkpoint_path every
+        that many RTTs.
+        """
+        if checkpoint_every and checkpoint_path is None:
+            raise ValueError("checkpoint_every needs a checkpoint_path")
+        if self.extrapolate and not checkpoint_every and self.cycle is None and self.is_deterministic():
+            self._run_until_cycle()
+        while self.rtt_count < self.max_rtt:
+            # Up to the next checkpoint, or straight to the end.
+            stop = (self.rtt_count // checkpoint_every + 1) * checkpoint_every if checkpoint_every else self.max_rtt
+            stop = min(stop, self.max_rtt)
+            self._simulate(self.rtt_count, stop)
+            self.rtt_count = stop
+            if checkpoint_every and self.rtt_count % checkpoint_every == 0:
+                self.save_checkpoint(checkpoint_path)
+
+    def save_checkpoint(self, path):
+        """Snapshot the controller, link, RNG and trace to path (see checkpoint.py)."""
+        checkpoint.save(self, path)
+
+    @staticmethod
+    def load_checkpoint(path):
+        """Return the simulation saved at path; run() continues it where it stopped."""
+        return checkpoint.load(path)
+
+    def throughput(self):
+        """Delivered cwnd units per unit of time."""
+        return self.delivered / self.elapsed if self.elapsed > 0 else 0.0
+
+    def plot_result(self, path=None, width=1000, height=600):
+        """
+        This function plots the congestion window size and threshold over time.
+        With a path the plot is rendered off screen and saved there instead of shown.
+        """
+        from tcp_plot import plot_trace
+        return plot_trace(self.trace, f'TCP {type(self.controller).__name__} Congestion Control Simulation',
+                          self.LOSS_PHASES, path, width, height)
+
+    def print_log(self, max_entries=15):
+        """This function prints the logged values"""
+        print("RTT | cwnd | ssthresh | Phase")
+        print("-" * 40)
+        for rtt, cwnd, ssthresh, phase in self.trace.rows(max_entries):
+            print(f"{rtt:3d} | {cwnd:4.1f} | "
+                  f"{ssthresh:4.1f} | {phase}")
+
+
+def run_script(simulator, description, argv=None):
+    """
+    Command line for the TCP_TAHOE.py / TCP_RENO.py scripts. Parameters come
+    from flags; with no flags on an interactive terminal they are prompted
+    for as before. Plots are drawn only when asked for, so scripted runs
+    never import matplotlib.
+    """
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("--mss", type=int)
+    parser.add_argument("--ssthresh", type=int)
+    parser.add_argument("--max-rtt", type=int)
+    parser.add_argument("--loss-interval", type=int)
+    parser.add_argument("--loss-probability", type=float, default=0.02,
+                        help="random loss probability per RTT on top of the forced losses")
+    parser.add_argument("--seed", type=int, help="seed of the simulation's own RNG (the global one otherwise)")
+    parser.add_argument("--log", type=int, default=15, help="number of trace rows to print")
+    parser.add_argument("--plot", help="save the plot to this image file")
+    parser.add_argument("--show", action="store_true", help="show the plot in a window")
+    args = parser.parse_args(argv)
+
+    interactive = argv is None and len(sys.argv) == 1 and sys.stdin.isatty()
+    if interactive:
+        args.mss = int(input("mss: "))
+        args.ssthresh = int(input("initial threshold: "))
+        args.max_rtt = int(input("max rtt: "))
+        args.loss_interval = int(input("loss interval: "))
+        args.show = True
+
+    sim = simulator(
+        mss=args.mss if args.mss is not None else 1,
+        initial_ssthresh=args.ssthresh if args.ssthresh is not None else 8,
+        rtt=1,
+        max_rtt=args.max_rtt if args.max_rtt is not None else 50,
+        loss_interval=args.loss_interval if args.loss_interval is not None else 15,
+        loss_probability=args.loss_probability,
+        rng=random.Random(args.seed) if args.seed is not None else random,
+    )
+    sim.run()
+    sim.print_log(max_entries=args.log)
+    if args.plot:
+        sim.plot_result(args.plot)
+    if args.show:
+        sim.plot_result()
+    return sim
+
+
+def compare_algorithms(algorithms, profiles, mss=1, initial_ssthresh=8, max_rtt=1000, seeds=range(10)):
+    """Mean throughput of every algorithm on every link profile, as {profile: {algorithm: throughput}}."""
+    results = {}
+    for profile in profiles:
+        results[profile.name] = {}
+        for algorithm in algorithms:
+            total = 0.0
+            for seed in seeds:
+                sim = TCPSimulation(congestion.create(algorithm, mss, initial_ssthresh), max_rtt, profile,
+                                    rng=random.Random(seed))
+                sim.run()
+                total += sim.throughput()
+            results[profile.name][algorithm] = total / len(seeds)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare congestion control algorithms on link profiles")
+    parser.add_argument("--algorithms", nargs="+", choices=sorted(congestion.CONTROLLERS), default=sorted(congestion.CONTROLLERS))
+    parser.add_argument("--profiles", nargs="+", choices=sorted(LINK_PROFILES), default=sorted(LINK_PROFILES))
+    parser.add_argument("--mss", type=int, default=1)
+    parser.add_argument("--ssthresh", type=int, default=8)
+    parser.add_argument("--max-rtt", type=int, default=1000)
+    parser.add_argument("--seeds", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    results = compare_algorithms(args.algorithms, [LINK_PROFILES[name] for name in args.profiles],
+                                 args.mss, args.ssthresh, args.max_rtt, range(args.seeds))
+    print("profile      " + "".join(f"{algorithm:>10s}" for algorithm in args.algorithms) + "   best")
+    for profile, throughputs in results.items():
+        best = max(throughputs, key=throughputs.get)
+        print(f"{profile:12s} " + "".join(f"{throughputs[algorithm]:10.2f}" for algorithm in args.algorithms) + f"   {best}")
+
+if __name__ == '__main__':
+    main()
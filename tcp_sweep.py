@@ -0,0 +1,134 @@
+# PARALLEL PARAMETER SWEEP RUNNER FOR THE TCP CONGESTION CONTROL SIMULATIONS
+
+import argparse
+import hashlib
+import itertools
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+import congestion
+
+PARAMETERS = ("algorithm", "mss", "initial_ssthresh", "max_rtt", "loss_interval", "seed")
+
+
+def simulator_class(algorithm):
+    """Return the simulator class (or an equivalent factory) for an algorithm name."""
+    if algorithm == "tahoe":
+        from TCP_TAHOE import TCPTahoe
+        return TCPTahoe
+    if algorithm == "reno":
+        from TCP_RENO import TCPReno
+        return TCPReno
+    if algorithm not in congestion.CONTROLLERS:
+        raise ValueError(f"Unknown algorithm: {algorithm}")
+    from tcp_simulation import TCPSimulation, LinkProfile
+
+    def simulator(mss, initial_ssthresh, max_rtt, loss_interval, rng=random):
+        return TCPSimulation(congestion.create(algorithm, mss, initial_ssthresh), max_rtt,
+                             LinkProfile(loss_interval=loss_interval), rng=rng)
+    return simulator
+
+
+def build_grid(algorithms, mss, initial_ssthresh, max_rtt, loss_interval, seeds):
+    """Expand the parameter lists into one cell per combination, in a stable order."""
+    return [dict(zip(PARAMETERS, values))
+            for values in itertools.product(algorithms, mss, initial_ssthresh, max_rtt, loss_interval, seeds)]
+
+
+def cell_key(cell):
+    """A string that identifies a cell in the results file."""
+    return json.dumps([cell[name] for name in PARAMETERS])
+
+
+def derive_seed(cell):
+    """
+    Derive the RNG seed of a cell from its parameters only, so a cell draws
+    the same random stream no matter which worker runs it or in which order.
+    """
+    digest = hashlib.sha256(cell_key(cell).encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+def run_cell(cell):
+    """Run one simulation and reduce its trace to summary metrics."""
+    sim = simulator_class(cell["algorithm"])(
+        mss=cell["mss"],
+        initial_ssthresh=cell["initial_ssthresh"],
+        max_rtt=cell["max_rtt"],
+        loss_interval=cell["loss_interval"],
+        rng=random.Random(derive_seed(cell)),
+    )
+    sim.run()
+
+    cwnd = sim.trace.cwnd_values().astype(np.float64)
+    phase_counts = np.bincount(sim.trace.phase_codes(), minlength=len(sim.PHASES))
+    mean_cwnd = float(cwnd.mean()) if len(cwnd) else 0.0
+    return dict(cell, **{
+        "mean_cwnd": mean_cwnd,
+        "throughput": sim.throughput(),
+        "loss_count": int(sum(phase_counts[code] for code in sim.LOSS_PHASES)),
+        "time_in_phase": {name: int(count) * sim.rtt for name, count in zip(sim.PHASES, phase_counts)},
+    })
+
+
+def completed_keys(output_path):
+    """Keys of the cells already present in a results file."""
+    if not os.path.exists(output_path):
+        return set()
+    done = set()
+    with open(output_path) as results:
+        for line in results:
+            try:
+                done.add(cell_key(json.loads(line)))
+            except (ValueError, KeyError):
+                # A line cut short by an interrupted run; the cell is redone.
+                continue
+    return done
+
+
+def run_sweep(cells, output_path, workers=None):
+    """
+    Run every cell not yet in output_path on a process pool, appending one
+    JSON line per cell as soon as it finishes. Returns the number of cells run.
+    """
+    done = completed_keys(output_path)
+    pending = [cell for cell in cells if cell_key(cell) not in done]
+    if not pending:
+        return 0
+
+    with open(output_path, 'a+') as results, ProcessPoolExecutor(max_workers=workers) as pool:
+        if results.tell():
+            results.seek(results.tell() - 1)
+            if results.read(1) != "\n":
+                results.write("\n")
+        futures = [pool.submit(run_cell, cell) for cell in pending]
+        for finished, future in enumerate(as_completed(futures), 1):
+            results.write(json.dumps(future.result()) + "\n")
+            results.flush()
+            print(f"\r{finished}/{len(pending)} cells done", end="", flush=True)
+    print()
+    return len(pending)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep TCP Tahoe/Reno over a parameter grid on all CPU cores")
+    parser.add_argument("--algorithms", nargs="+", choices=sorted(congestion.CONTROLLERS), default=["tahoe", "reno"])
+    parser.add_argument("--mss", nargs="+", type=int, default=[1])
+    parser.add_argument("--ssthresh", nargs="+", type=int, default=[8])
+    parser.add_argument("--max-rtt", nargs="+", type=int, default=[50])
+    parser.add_argument("--loss-interval", nargs="+", type=int, default=[8, 15])
+    parser.add_argument("--seeds", type=int, default=10, help="number of seeds per parameter combination")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--output", default="sweep_results.jsonl")
+    args = parser.parse_args(argv)
+
+    cells = build_grid(args.algorithms, args.mss, args.ssthresh, args.max_rtt, args.loss_interval, range(args.seeds))
+    ran = run_sweep(cells, args.output, args.workers)
+    print(f"Ran {ran} of {len(cells)} cells, results in {args.output}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,224 @@
+# COMPACT PER-RTT TRACE STORAGE FOR THE TCP SIMULATIONS
+
+import numpy as np
+
+TRACE_MODES = ("full", "decimate", "ring")
+
+
+class TraceRecorder:
+    """
+    Per-RTT trace of cwnd, ssthresh and phase backed by preallocated typed
+    arrays: float32 windows, a uint8 phase code indexing phase_names, and an
+    implicit RTT index, i.e. 9 bytes per recorded RTT.
+
+    mode="full" keeps every RTT, mode="decimate" keeps every decimation-th
+    RTT, and mode="ring" keeps only the last `capacity` RTTs.
+
+    record() only extends a flat Python list, which is cheaper per RTT than
+    writing numpy scalars one element at a time, and flush() copies it into
+    the arrays BLOCK RTTs at a time.
+    """
+
+    BLOCK = 4096
+    _PENDING_LIMIT = 3 * BLOCK
+
+    def __init__(self, capacity, phase_names, mode="full", decimation=1):
+        if mode not in TRACE_MODES:
+            raise ValueError(f"Unknown trace mode: {mode}")
+        if mode == "decimate":
+            capacity = -(-capacity // decimation)
+        else:
+            decimation = 1
+        self.phase_names = tuple(phase_names)
+        self.mode = mode
+        self.decimation = decimation
+        self.capacity = max(capacity, 1)
+        self.cwnd = np.empty(self.capacity, dtype=np.float32)
+        self.ssthresh = np.empty(self.capacity, dtype=np.float32)
+        self.phase = np.empty(self.capacity, dtype=np.uint8)
+        self.total_rtts = 0
+        self.stored = 0
+        self._clear_pending()
+
+    def record(self, cwnd, ssthresh, phase_code):
+        """Log the state at the end of the next RTT."""
+        self._extend_pending((cwnd, ssthresh, phase_code))
+        if len(self._pending) == self._PENDING_LIMIT:
+            self.flush()
+
+    def flush(self):
+        """Copy the RTTs buffered by record() into the arrays; every read does this first."""
+        if self._pending:
+            cwnd, ssthresh, phase_codes = np.array(self._pending).reshape(-1, 3).T
+            self._clear_pending()
+            self._write(cwnd, ssthresh, phase_codes, len(cwnd))
+
+    def _clear_pending(self):
+        self._pending = []
+        self._extend_pending = self._pending.extend
+
+    def record_cycle(self, cwnd, ssthresh, phase_codes, count):
+        """
+        Log the next `count` RTTs, which repeat the per-RTT states in cwnd,
+        ssthresh and phase_codes over and over. Only the entries the mode
+        keeps are written, so a ring costs O(capacity) however long the run.
+        """
+        self.flush()
+        self._write(cwnd, ssthresh, phase_codes, count)
+
+    def _write(self, cwnd, ssthresh, phase_codes, count):
+        """Store `count` RTTs that cycle through the given per-RTT states, as the mode dictates."""
+        start = self.total_rtts
+        self.total_rtts += count
+        first = -(-start // self.decimation) * self.decimation
+        kept = len(range(first, self.total_rtts, self.decimation))
+        skipped = max(kept - self.capacity, 0) if self.mode == "ring" else 0
+        positions = (first - start + np.arange(skipped, kept) * self.decimation) % len(cwnd)
+        if self.mode == "ring":
+            index = (self.stored + np.arange(skipped, kept)) % self.capacity
+        else:
+            while self.stored + kept > self.capacity:
+                self._grow()
+            index = slice(self.stored, self.stored + kept)
+        self.cwnd[index] = np.asarray(cwnd, dtype=np.float32)[positions]
+        self.ssthresh[index] = np.asarray(ssthresh, dtype=np.float32)[positions]
+        self.phase[index] = np.asarray(phase_codes, dtype=np.uint8)[positions]
+        self.stored += kept
+
+    def _grow(self):
+        """Double the capacity when more RTTs arrive than were preallocated."""
+        self.capacity *= 2
+        self.cwnd = np.resize(self.cwnd, self.capacity)
+        self.ssthresh = np.resize(self.ssthresh, self.capacity)
+        self.phase = np.resize(self.phase, self.capacity)
+
+    def __len__(self):
+        self.flush()
+        return min(self.stored, self.capacity)
+
+    def _ordered(self, column):
+        """Return the stored part of a column, oldest entry first."""
+        self.flush()
+        if self.mode == "ring" and self.stored > self.capacity:
+            split = self.stored % self.capacity
+            return np.concatenate((column[split:], column[:split]))
+        return column[:len(self)]
+
+    def rtts(self):
+        """RTT index of every stored entry."""
+        self.flush()
+        first = (self.stored - len(self)) * self.decimation
+        return np.arange(first, first + len(self) * self.decimation, self.decimation)
+
+    def cwnd_values(self):
+        return self._ordered(self.cwnd)
+
+    def ssthresh_values(self):
+        return self._ordered(self.ssthresh)
+
+    def phase_codes(self):
+        return self._ordered(self.phase)
+
+    def phases(self):
+        """Phase name of every stored entry."""
+        return [self.phase_names[code] for code in self.phase_codes()]
+
+    def rows(self, max_entries=None):
+        """Yield (rtt, cwnd, ssthresh, phase name) tuples, oldest first."""
+        count = len(self) if max_entries is None else min(max_entries, len(self))
+        rtts = self.rtts()
+        cwnd = self.cwnd_values()
+        ssthresh = self.ssthresh_values()
+        phase = self.phase_codes()
+        for i in range(count):
+            yield int(rtts[i]), float(cwnd[i]), float(ssthresh[i]), self.phase_names[phase[i]]
+
+    @property
+    def nbytes(self):
+        return self.cwnd.nbytes + self.ssthresh.nbytes + self.phase.nbytes
+
+    def __getstate__(self):
+        """Pickle only the stored entries, not the unused preallocated tail."""
+        self.flush()
+        state = self.__dict__.copy()
+        used = len(self)
+        for column in ('cwnd', 'ssthresh', 'phase'):
+            state[column] = state[column][:used].copy()
+        return state
+
+    def __setstate__(self, state):
+        for column in ('cwnd', 'ssthresh', 'phase'):
+            state[column] = np.resize(state[column], state['capacity'])
+        self.__dict__.update(state)
+
+
+class StreamingTraceRecorder:
+    """
+    A drop-in replacement for TraceRecorder that streams every RTT to a
+    columnar trace directory (see trace_store.py) instead of keeping it in
+    memory. The read methods close the file on first use and read it back,
+    so they are meant for after the run; ColumnarReader can slice the
+    directory at any time once it is closed.
+    """
+
+    COLUMNS = {'rtt': '<i8', 'cwnd': '<f4', 'ssthresh': '<f4', 'phase': 'u1'}
+
+    def __init__(self, directory, phase_names, chunk_size=65536, format="npy"):
+        from trace_store import ColumnarWriter
+        self.phase_names = tuple(phase_names)
+        self.directory = directory
+        self.writer = ColumnarWriter(directory, self.COLUMNS, chunk_size, format,
+                                     attributes={'phase_names': list(self.phase_names)})
+        self.reader = None
+        self.total_rtts = 0
+
+    def record(self, cwnd, ssthresh, phase_code):
+        self.writer.append(self.total_rtts, cwnd, ssthresh, phase_code)
+        self.total_rtts += 1
+
+    def record_cycle(self, cwnd, ssthresh, phase_codes, count, block=65536):
+        """Stream the next `count` RTTs, repeating the given per-RTT states, a block at a time."""
+        period = len(cwnd)
+        columns = {'cwnd': np.asarray(cwnd, dtype=np.float32), 'ssthresh': np.asarray(ssthresh, dtype=np.float32),
+                   'phase': np.asarray(phase_codes, dtype=np.uint8)}
+        for start in range(0, count, block):
+            offsets = np.arange(start, min(start + block, count))
+            positions = offsets % period
+            self.writer.extend(rtt=self.total_rtts + offsets,
+                               **{name: values[positions] for name, values in columns.items()})
+        self.total_rtts += count
+
+    def close(self):
+        if self.reader is None:
+            from trace_store import ColumnarReader
+            self.writer.close()
+            self.reader = ColumnarReader(self.directory)
+
+    def __len__(self):
+        return self.total_rtts
+
+    def _column(self, name):
+        self.close()
+        return self.reader.column(name)
+
+    def rtts(self):
+        return self._column('rtt')
+
+    def cwnd_values(self):
+        return self._column('cwnd')
+
+    def ssthresh_values(self):
+        return self._column('ssthresh')
+
+    def phase_codes(self):
+        return self._column('phase')
+
+    def phases(self):
+        return [self.phase_names[code] for code in self.phase_codes()]
+
+    def rows(self, max_entries=None):
+        """Yield (rtt, cwnd, ssthresh, phase name) tuples, reading only the rows asked for."""
+        self.close()
+        columns = self.reader.read(0, max_entries)
+        for rtt, cwnd, ssthresh, phase in zip(columns['rtt'], columns['cwnd'], columns['ssthresh'], columns['phase']):
+            yield int(rtt), float(cwnd), float(ssthresh), self.phase_names[phase]
@@ -0,0 +1,13 @@
+import pytest
+
+import congestion
+
+
+# BBR is left out: its drain and probe gains lower the window on purpose.
+@pytest.mark.parametrize("name", ["tahoe", "reno", "newreno", "cubic"])
+def test_ack_never_shrinks_cwnd(name):
+    controller = congestion.create(name, mss=1, initial_ssthresh=8)
+    for ack in range(200):
+        before = controller.cwnd
+        controller.on_ack(before, 1)
+        assert controller.cwnd >= before, f"cwnd fell from {before} to {controller.cwnd} on ACK {ack}"
@@ -0,0 +1,205 @@
+# CHUNKED COLUMNAR TRACE FILES (NUMPY .npy OR PARQUET) WITH RANGE READS
+
+import argparse
+import json
+import os
+
+import numpy as np
+
+STORE_FORMATS = ("npy", "parquet")
+NPY_HEADER_SIZE = 128
+META_FILE = "meta.json"
+
+
+def _npy_header(dtype, rows):
+    """
+    A fixed-size .npy header, so the final row count can be written over the
+    provisional one when the file is closed.
+    """
+    header = repr({'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False, 'shape': (rows,)})
+    header = header.ljust(NPY_HEADER_SIZE - 10 - 1) + "\n"
+    return b"\x93NUMPY\x01\x00" + len(header).to_bytes(2, 'little') + header.encode('latin1')
+
+
+class ColumnarWriter:
+    """
+    Streams rows into a directory holding one file per column (format="npy")
+    or a single Parquet file with one row group per chunk (format="parquet"),
+    plus meta.json. Rows are buffered chunk_size at a time in preallocated
+    arrays, so memory use does not grow with the length of the run.
+    """
+
+    def __init__(self, directory, columns, chunk_size=65536, format="npy", attributes=None):
+        if format not in STORE_FORMATS:
+            raise ValueError(f"Unknown trace format: {format}")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.columns = {name: np.dtype(dtype) for name, dtype in columns.items()}
+        self.chunk_size = chunk_size
+        self.format = format
+        self.attributes = attributes or {}
+        self.rows = 0
+        self.buffered = 0
+        self.buffers = {name: np.empty(chunk_size, dtype=dtype) for name, dtype in self.columns.items()}
+
+        if format == "npy":
+            self.files = {}
+            for name, dtype in self.columns.items():
+                column_file = open(os.path.join(directory, f"{name}.npy"), 'wb')
+                column_file.write(_npy_header(dtype, 0))
+                self.files[name] = column_file
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            self.schema = pa.schema([(name, pa.from_numpy_dtype(dtype)) for name, dtype in self.columns.items()])
+            self.parquet = pq.ParquetWriter(os.path.join(directory, "trace.parquet"), self.schema)
+
+    def append(self, *values):
+        """Add one row, with a value for every column in order."""
+        index = self.buffered
+        for buffer, value in zip(self.buffers.values(), values):
+            buffer[index] = value
+        self.buffered += 1
+        if self.buffered == self.chunk_size:
+            self.flush()
+
+    def extend(self, **arrays):
+        """Add many rows at once from equally long column arrays."""
+        length = len(next(iter(arrays.values())))
+        start = 0
+        while start < length:
+            take = min(self.chunk_size - self.buffered, length - start)
+            for name, buffer in self.buffers.items():
+                buffer[self.buffered:self.buffered + take] = arrays[name][start:start + take]
+            self.buffered += take
+            start += take
+            if self.buffered == self.chunk_size:
+                self.flush()
+
+    def flush(self):
+        """Write the buffered rows out as one chunk."""
+        if not self.buffered:
+            return
+        if self.format == "npy":
+            for name, buffer in self.buffers.items():
+                self.files[name].write(buffer[:self.buffered].tobytes())
+        else:
+            import pyarrow as pa
+            self.parquet.write_table(pa.table({name: buffer[:self.buffered] for name, buffer in self.buffers.items()},
+                                              schema=self.schema))
+        self.rows += self.buffered
+        self.buffered = 0
+
+    def close(self):
+        self.flush()
+        if self.format == "npy":
+            for name, column_file in self.files.items():
+                column_file.seek(0)
+                column_file.write(_npy_header(self.columns[name], self.rows))
+                column_file.close()
+        else:
+            self.parquet.close()
+        with open(os.path.join(self.directory, META_FILE), 'w') as meta:
+            json.dump({'format': self.format, 'rows': self.rows, 'chunk_size': self.chunk_size,
+                       'columns': {name: dtype.str for name, dtype in self.columns.items()},
+                       'attributes': self.attributes}, meta, indent=2)
+
+    def __getstate__(self):
+        """
+        Pickle the writer as of its last flushed chunk; unpickling reopens the
+        column files and cuts off anything written after that point, so a
+        resumed run appends exactly where the checkpoint was taken.
+        """
+        if self.format != "npy":
+            raise TypeError("Only npy trace writers can be checkpointed")
+        self.flush()
+        for column_file in self.files.values():
+            column_file.flush()
+            os.fsync(column_file.fileno())
+        state = self.__dict__.copy()
+        del state['files'], state['buffers']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.buffers = {name: np.empty(self.chunk_size, dtype=dtype) for name, dtype in self.columns.items()}
+        self.files = {}
+        for name, dtype in self.columns.items():
+            column_file = open(os.path.join(self.directory, f"{name}.npy"), 'r+b')
+            column_file.truncate(NPY_HEADER_SIZE + self.rows * dtype.itemsize)
+            column_file.seek(0, os.SEEK_END)
+            self.files[name] = column_file
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ColumnarReader:
+    """
+    Reads a directory written by ColumnarWriter. read(start, stop) returns
+    only the requested rows: .npy columns are memory-mapped, and Parquet
+    files are read one row group at a time.
+    """
+
+    def __init__(self, directory):
+        with open(os.path.join(directory, META_FILE)) as meta:
+            self.meta = json.load(meta)
+        self.directory = directory
+        self.format = self.meta['format']
+        self.columns = {name: np.dtype(dtype) for name, dtype in self.meta['columns'].items()}
+        self.attributes = self.meta['attributes']
+        if self.format == "npy":
+            self.arrays = {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode='r')
+                           for name in self.columns}
+        else:
+            import pyarrow.parquet as pq
+            self.parquet = pq.ParquetFile(os.path.join(directory, "trace.parquet"))
+            sizes = [self.parquet.metadata.row_group(i).num_rows for i in range(self.parquet.num_row_groups)]
+            self.group_starts = np.concatenate(([0], np.cumsum(sizes)))
+
+    def __len__(self):
+        return self.meta['rows']
+
+    def read(self, start=0, stop=None, columns=None):
+        """Return {column: array} for rows [start, stop)."""
+        start, stop, _ = slice(start, stop).indices(len(self))
+        columns = list(columns) if columns is not None else list(self.columns)
+        if self.format == "npy":
+            return {name: np.array(self.arrays[name][start:stop]) for name in columns}
+        if stop <= start:
+            return {name: np.empty(0, dtype=self.columns[name]) for name in columns}
+        first = int(np.searchsorted(self.group_starts, start, side='right')) - 1
+        last = int(np.searchsorted(self.group_starts, stop, side='left'))
+        table = self.parquet.read_row_groups(range(first, last), columns=columns)
+        offset = start - int(self.group_starts[first])
+        table = table.slice(offset, stop - start)
+        return {name: table.column(name).to_numpy() for name in columns}
+
+    def column(self, name, start=0, stop=None):
+        return self.read(start, stop, [name])[name]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Inspect a columnar trace directory")
+    parser.add_argument("directory")
+    parser.add_argument("--start", type=int, default=0)
+    parser.add_argument("--stop", type=int)
+    parser.add_argument("--columns", nargs="+")
+    args = parser.parse_args(argv)
+
+    reader = ColumnarReader(args.directory)
+    print(f"{len(reader)} rows, format {reader.format}, columns: {', '.join(reader.columns)}")
+    for name, value in reader.attributes.items():
+        print(f"{name}: {value}")
+    stop = args.stop if args.stop is not None else min(args.start + 20, len(reader))
+    rows = reader.read(args.start, stop, args.columns)
+    names = list(rows)
+    print(" | ".join(names))
+    for values in zip(*rows.values()):
+        print(" | ".join(str(value) for value in values))
+
+if __name__ == '__main__':
+    main()